@@ -5,53 +5,89 @@
     all eviction strategies and cache sizes k * num_concepts where k \in [.2, .4, .8, 1.]"""
 
 import argparse 
-import pandas as pd
-from ontolearn.semantic_caching import run_semantic_cache, concept_generator
+import csv
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+import torch
+from ontolearn.semantic_caching import run_semantic_cache, get_saved_concepts, get_data_name, clear_loaded_reasoners
 
 
 parser = argparse.ArgumentParser()
-parser.add_argument('--cache_size_ratios', type=list, default=[.1, .2, .4, .8, 1.], help="cache size is proportional to num_concepts, cache size = k * num_concepts")
-parser.add_argument('--path_kg', type=str, default=["KGs/Family/family.owl"])
-parser.add_argument('--path_kge', type=list, default=None)
+parser.add_argument('--cache_size_ratios', type=float, nargs='+', default=[.1, .2, .4, .8, 1.], help="cache size is proportional to num_concepts, cache size = k * num_concepts")
+parser.add_argument('--path_kg', type=str, nargs='+', default=["KGs/Family/family.owl"])
+parser.add_argument('--path_kge', type=str, default=None)
 parser.add_argument('--name_reasoner', type=str, default='EBR', choices=["EBR", 'HermiT', 'Pellet', 'JFact', 'Openllet'])
 parser.add_argument('--eviction_strategy', type=str, default='LRU', choices=['LIFO', 'FIFO', 'LRU', 'MRU', 'RP'])
 parser.add_argument('--random_seed_for_RP', type=int, default=10, help="Random seed if the eviction strategy is RP")
 parser.add_argument('--cache_type', type=str, default='cold', choices=['hot', 'cold'], help="Type of cache to be used. With cold cache, we initialize the cache with NC, NNC, and existential concepts")
 parser.add_argument('--shuffle_concepts', action='store_true',help="If set, we shuffle the concepts for randomness")
+parser.add_argument('--num_workers', type=int, default=1, help="Number of runs of the sweep executed in parallel. Parallel runs compete for CPU, memory and JVMs and each worker loads its own reasoners, so the reported runtimes are only comparable with 1 worker")
+# There is no batch size option: run_semantic_cache retrieves each concept with one reasoner call (instances() of the
+# symbolic reasoner or of the neural reasoner), so there are no per-individual calls to chunk.
 args = parser.parse_args()
 
 def get_cache_size(list_k, path_kg):
-    
-    data_size = len(concept_generator(path_kg))
+    # Generating (and saving) the concepts here also lets every worker load the same concepts from disk.
+    data_size = len(get_saved_concepts(path_kg, data_name=get_data_name(path_kg), shuffle=args.shuffle_concepts))
 
     return [max(1, int(k * data_size)) for k in list_k]
 
+def init_worker():
+    # Reasoners may be multi-threaded themselves, avoid oversubscribing the cores. torch is imported (through
+    # ontolearn) before the pool forks, so its thread pool has to be resized: setting OMP_NUM_THREADS here is too late.
+    torch.set_num_threads(1)
 
-results = []
-detailed_results = []
-for path_kg in args.path_kg:
-    for cache_size in get_cache_size(args.cache_size_ratios, path_kg):
-        for strategy in ['LIFO', 'FIFO', 'LRU', 'MRU', 'RP']:
-            result, detailed = run_semantic_cache(
-                path_kg=path_kg,
-                path_kge=args.path_kge,
-                cache_size=cache_size,
-                name_reasoner=args.name_reasoner,
-                eviction=strategy,
-                random_seed=args.random_seed_for_RP,
-                cache_type=args.cache_type,
-                shuffle_concepts=args.shuffle_concepts
-            )
-            results.append(result)
-            detailed_results.append(detailed)
-
-    data_name = result['dataset']
-    df = pd.DataFrame(results)
-    all_detailed_results = pd.DataFrame([item for sublist in detailed_results for item in sublist])
-    print(df)
-    
-    # Save to CSV
-    df.to_csv(f'caching_results_{data_name}/cache_experiments_{args.name_reasoner}_{data_name}_{args.cache_type}.csv', index=False)
-    all_detailed_results.to_csv(f'caching_results_{data_name}/detailled_experiments_{args.name_reasoner}_{data_name}_{args.cache_type}.csv', index=False)
+# KG whose reasoners are loaded in this process
+current_kg = None
 
+def run(task):
+    global current_kg
+    path_kg, cache_size, strategy = task
+    if path_kg != current_kg:
+        # Reasoners are shared across the cache-size sweep of a KG only
+        clear_loaded_reasoners()
+        current_kg = path_kg
+    return run_semantic_cache(
+        path_kg=path_kg,
+        path_kge=args.path_kge,
+        cache_size=cache_size,
+        name_reasoner=args.name_reasoner,
+        eviction=strategy,
+        random_seed=args.random_seed_for_RP,
+        cache_type=args.cache_type,
+        shuffle_concepts=args.shuffle_concepts
+    )
 
+
+if __name__ == '__main__':
+    for path_kg in args.path_kg:
+        tasks = itertools.product([path_kg], get_cache_size(args.cache_size_ratios, path_kg), ['LIFO', 'FIFO', 'LRU', 'MRU', 'RP'])
+        data_name = get_data_name(path_kg)
+
+        # Rows are written as soon as a run finishes, so an interrupted sweep keeps the finished runs.
+        with open(f'caching_results_{data_name}/cache_experiments_{args.name_reasoner}_{data_name}_{args.cache_type}.csv', 'w', newline='') as results_file, \
+                open(f'caching_results_{data_name}/detailled_experiments_{args.name_reasoner}_{data_name}_{args.cache_type}.csv', 'w', newline='') as detailed_file:
+            results_writer = None
+            detailed_writer = None
+            # Every run is independent, map keeps the results in the order of the sweep. A single worker runs in this
+            # process, so the reasoners of a KG are loaded once for the whole sweep.
+            with ProcessPoolExecutor(max_workers=args.num_workers, initializer=init_worker) if args.num_workers > 1 \
+                    else nullcontext() as executor:
+                for result, detailed in (executor.map if executor else map)(run, tasks):
+                    if results_writer is None:
+                        results_writer = csv.DictWriter(results_file, fieldnames=list(result))
+                        results_writer.writeheader()
+                    results_writer.writerow(result)
+                    if detailed_writer is None and detailed:
+                        detailed_writer = csv.DictWriter(detailed_file, fieldnames=list(detailed[0]))
+                        detailed_writer.writeheader()
+                    if detailed:
+                        detailed_writer.writerows(detailed)
+                    results_file.flush()
+                    detailed_file.flush()
+                    print(result)
+
+        # The reasoners of this KG are not needed by the next one
+        clear_loaded_reasoners()
+        current_kg = None
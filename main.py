@@ -22,112 +22,139 @@
 # SOFTWARE.
 # -----------------------------------------------------------------------------
 
+from itertools import chain
+from typing import Any, List, NamedTuple, Optional
 from ontolearn.executor import execute
 from argparse import ArgumentParser
 
 
-def get_default_arguments(description=None):
+class ArgSpec(NamedTuple):
+    """Specification of a command line argument."""
+    flag: str
+    type: type
+    default: Any
+    help: str
+    choices: Optional[list] = None
+    nargs: Optional[str] = None
+
+
+# Knowledge graph-related arguments
+knowledge_graph_args: List[ArgSpec] = [
+    ArgSpec("--knowledge_base_path", str, "KGs/Family/family-benchmark_rich_background.owl",
+            "Path to the knowledge base/ontology. This file contains '.owl' extension,"
+            "e.g. 'some/path/kb.owl'"),
+    ArgSpec("--sparql_endpoint", str, None,
+            "An endpoint of a triple store, e.g. 'http://localhost:3030/family/sparql'. "),
+    ArgSpec("--path_of_embeddings", str, 'NCESData/family/embeddings/ConEx_entity_embeddings.csv',
+            "Path to knowledge base embeddings. Some models like NCES require this."
+            "e.g. 'some/path/kb_embeddings.csv'"),
+]
+
+# Common model arguments
+model_specific_args: List[ArgSpec] = [
+    ArgSpec("--path_learning_problem", str, 'examples/uncle_lp2.json',
+            "Path to a .json file that contains 2 properties 'positive_examples' and "
+            "'negative_examples'. Each of these properties should contain the IRIs of the respective"
+            "instances. e.g. 'some/path/lp.json'"),
+    ArgSpec("--quality_metric", str, 'f1', "Quality metric.",
+            choices=["f1", "accuracy", "recall", "precision", "weighted_accuracy"]),
+    ArgSpec("--max_runtime", int, 5, "Maximum runtime."),
+    # CELOE, OCEL, and Evolearner only
+    ArgSpec('--terminate_on_goal', bool, True, "Terminate when finding concept of quality1.0?"),
+    ArgSpec("--use_card_restrictions", bool, True, "Use cardinality restrictions for object properties?"),
+    ArgSpec("--use_inverse", bool, True, "Use inverse."),
+    ArgSpec("--card_limit", int, 10, "Cardinality limit for object properties."),
+    ArgSpec("--max_nr_splits", int, 12, "Maximum number of splits."),
+    # CELOE and OCEL only
+    ArgSpec("--max_results", int, 10, "Maximum results to find (not to show)"),
+    ArgSpec("--iter_bound", int, 10_000, "Iterations bound."),
+    ArgSpec("--max_num_of_concepts_tested", int, 10_000, "Maximum number of concepts tested."),
+    ArgSpec("--best_only", bool, True, "Best results only?"),
+    ArgSpec("--calculate_min_max", bool, True, "Only for statistical purpose."),
+    ArgSpec("--gain_bonus_factor", float, 0.3,
+            "Factor that weighs the increase in quality compared to the parent node."),
+    ArgSpec("--expansion_penalty_factor", float, 0.1,
+            "The value that is subtracted from the heuristic for each horizontal expansion of this"),
+    ArgSpec("--max_child_length", int, 10, "Maximum child length"),
+    ArgSpec("--use_negation", bool, True, "Use negation?"),
+    ArgSpec("--use_all_constructor", bool, True, "Use all constructors?"),
+    ArgSpec("--use_numeric_datatypes", bool, True, "Use numeric data types?"),
+    ArgSpec("--use_time_datatypes", bool, True, "Use time datatypes?"),
+    ArgSpec("--use_boolean_datatype", bool, True, "Use boolean datatypes?"),
+    # CELOE only
+    ArgSpec("--start_node_bonus", float, 0.1, "Special value added to the root node."),
+    ArgSpec("--node_refinement_penalty", float, 0.001, "Node refinement penalty."),
+]
+
+# EvoLearner Only
+evo_learner_args: List[ArgSpec] = [
+    ArgSpec("--use_data_properties", bool, True, "Use data properties?"),
+    ArgSpec("--tournament_size", int, 7, "Tournament size."),
+    ArgSpec("--population_size", int, 800, "Population size."),
+    ArgSpec("--num_generations", int, 200, "Number of generations."),
+    ArgSpec("--height_limit", int, 17, "Height limit."),
+    ArgSpec("--gain", int, 2048, "Gain."),
+    ArgSpec("--penalty", int, 1, "Penalty."),
+    ArgSpec("--max_t", int, 2, "Number of paths."),
+    ArgSpec("--jump_pr", float, 0.5, "Probability to explore paths of length 2."),
+    ArgSpec("--crossover_pr", float, 0.9, "Crossover probability."),
+    ArgSpec("--mutation_pr", float, 0.1, "Mutation probability"),
+    ArgSpec("--elitism", bool, False, "Elitism."),
+    ArgSpec("--elite_size", float, 0.1, "Elite size"),
+    ArgSpec("--min_height", int, 1, "Minimum height of trees"),
+    ArgSpec("--max_height", int, 3, "Maximum height of trees"),
+    ArgSpec("--init_method_type", str, "RAMPED_HALF_HALF", "Random initialization method.",
+            choices=["GROW", "FULL", "RAMPED_HALF_HALF"]),
+]
+
+# NCES only
+nces_args: List[ArgSpec] = [
+    ArgSpec("--learner_names", str, ["SetTransformer"], "Learner name.", choices=["SetTransformer", "GRU", "LSTM"],
+            nargs="+"),
+    ArgSpec("--proj_dim", int, 128, "Number of projection dimensions."),
+    ArgSpec("--rnn_n_layers", int, 2, "Number of RNN layers (only for LSTM and GRU)."),
+    ArgSpec("--drop_prob", float, 0.1, "Drop probability."),
+    ArgSpec("--num_heads", int, 4, "Number of heads"),
+    ArgSpec("--num_seeds", int, 1, "Number of seeds (only for SetTransformer)."),
+    ArgSpec("--m", int, 32, "Number of inducing points (only for SetTransformer)."),
+    ArgSpec("--ln", bool, False, "Layer normalization (only for SetTransformer)."),
+    ArgSpec("--learning_rate", float, 1e-4, "Learning rate."),
+    ArgSpec("--decay_rate", int, 0, "Decay rate."),
+    ArgSpec("--clip_value", int, 5, "Clip value."),
+    ArgSpec("--batch_size", int, 256, "Batch size"),
+    ArgSpec("--num_workers", int, 8, "Number of workers"),
+    ArgSpec("--max_length", int, 48, "Maximum length"),
+    ArgSpec("--load_pretrained", bool, True, "Load pretrained."),
+    ArgSpec("--sorted_examples", bool, True, "Sorted examples."),
+    ArgSpec("--pretrained_model_name", str, "SetTransformer", "Pretrained model name",
+            choices=["SetTransformer", "GRU", "LSTM"]),
+]
+
+
+def _build_parser() -> ArgumentParser:
     parser = ArgumentParser()
 
     parser.add_argument("--model", type=str, default="celoe", choices=["celoe", "ocel", "evolearner", "nces"],
                         help="Available concept learning models.")
-
-    # Knowledge graph-related arguments
-    parser.add_argument("--knowledge_base_path", type=str, default="KGs/Family/family-benchmark_rich_background.owl",
-                        help="Path to the knowledge base/ontology. This file contains '.owl' extension,"
-                             "e.g. 'some/path/kb.owl'")
-    parser.add_argument("--sparql_endpoint", type=str, default=None,
-                        help="An endpoint of a triple store, e.g. 'http://localhost:3030/family/sparql'. ")
-    parser.add_argument("--path_of_embeddings", type=str,
-                        default='NCESData/family/embeddings/ConEx_entity_embeddings.csv',
-                        help="Path to knowledge base embeddings. Some models like NCES require this."
-                             "e.g. 'some/path/kb_embeddings.csv'")
     parser.add_argument("--save", action="store_true", help="save the hypothesis?")
-    # Common model arguments
-    parser.add_argument("--path_learning_problem", type=str, default='examples/uncle_lp2.json',
-                        help="Path to a .json file that contains 2 properties 'positive_examples' and "
-                             "'negative_examples'. Each of these properties should contain the IRIs of the respective"
-                             "instances. e.g. 'some/path/lp.json'")
-    parser.add_argument("--quality_metric", type=str, default='f1',
-                        choices=["f1", "accuracy", "recall", "precision", "weighted_accuracy"],
-                        help="Quality metric.")
-    parser.add_argument("--max_runtime", type=int, default=5, help="Maximum runtime.")
-
-    # CELOE, OCEL, and Evolearner only
+    for a in chain(knowledge_graph_args, model_specific_args, evo_learner_args, nces_args):
+        kwargs = {'type': a.type, 'default': a.default, 'help': a.help}
+        if a.choices is not None:
+            kwargs['choices'] = a.choices
+        if a.nargs is not None:
+            kwargs['nargs'] = a.nargs
+        parser.add_argument(a.flag, **kwargs)
+    return parser
 
-    parser.add_argument('--terminate_on_goal', type=bool, default=True, help="Terminate when finding concept of quality"
-                                                                             "1.0?")
-    parser.add_argument("--use_card_restrictions", type=bool, default=True,
-                        help="Use cardinality restrictions for object properties?")
-    parser.add_argument("--use_inverse", type=bool, default=True, help="Use inverse.")
-    parser.add_argument("--card_limit", type=int, default=10, help="Cardinality limit for object properties.")
-    parser.add_argument("--max_nr_splits", type=int, default=12, help="Maximum number of splits.")
 
-    # CELOE and OCEL only
-    parser.add_argument("--max_results", type=int, default=10, help="Maximum results to find (not to show)")
-    parser.add_argument("--iter_bound", type=int, default=10_000, help="Iterations bound.")
-    parser.add_argument("--max_num_of_concepts_tested", type=int, default=10_000,
-                        help="Maximum number of concepts tested.")
-    parser.add_argument("--best_only", type=bool, default=True, help="Best results only?")
-    parser.add_argument("--calculate_min_max", type=bool, default=True, help="Only for statistical purpose.")
-    parser.add_argument("--gain_bonus_factor", type=float, default=0.3,
-                        help="Factor that weighs the increase in quality compared to the parent node.")
-    parser.add_argument("--expansion_penalty_factor", type=float, default=0.1,
-                        help="The value that is subtracted from the heuristic for each horizontal expansion of this")
-    parser.add_argument("--max_child_length", type=int, default=10, help="Maximum child length")
-    parser.add_argument("--use_negation", type=bool, default=True, help="Use negation?")
-    parser.add_argument("--use_all_constructor", type=bool, default=True, help="Use all constructors?")
-    parser.add_argument("--use_numeric_datatypes", type=bool, default=True, help="Use numeric data types?")
-    parser.add_argument("--use_time_datatypes", type=bool, default=True, help="Use time datatypes?")
-    parser.add_argument("--use_boolean_datatype", type=bool, default=True, help="Use boolean datatypes?")
+# Built once at import, every call of get_default_arguments only parses.
+_PARSER = _build_parser()
 
-    # CELOE only
-    parser.add_argument("--start_node_bonus", type=float, default=0.1, help="Special value added to the root node.")
-    parser.add_argument("--node_refinement_penalty", type=float, default=0.001, help="Node refinement penalty.")
-
-    # EvoLearner Only
-    parser.add_argument("--use_data_properties", type=bool, default=True, help="Use data properties?")
-    parser.add_argument("--tournament_size", type=int, default=7, help="Tournament size.")
-    parser.add_argument("--population_size", type=int, default=800, help="Population size.")
-    parser.add_argument("--num_generations", type=int, default=200, help="Number of generations.")
-    parser.add_argument("--height_limit", type=int, default=17, help="Height limit.")
-    parser.add_argument("--gain", type=int, default=2048, help="Gain.")
-    parser.add_argument("--penalty", type=int, default=1, help="Penalty.")
-    parser.add_argument("--max_t", type=int, default=2, help="Number of paths.")
-    parser.add_argument("--jump_pr", type=float, default=0.5, help="Probability to explore paths of length 2.")
-    parser.add_argument("--crossover_pr", type=float, default=0.9, help="Crossover probability.")
-    parser.add_argument("--mutation_pr", type=float, default=0.1, help="Mutation probability")
-    parser.add_argument("--elitism", type=bool, default=False, help="Elitism.")
-    parser.add_argument("--elite_size", type=float, default=0.1, help="Elite size")
-    parser.add_argument("--min_height", type=int, default=1, help="Minimum height of trees")
-    parser.add_argument("--max_height", type=int, default=3, help="Maximum height of trees")
-    parser.add_argument("--init_method_type", type=str, default="RAMPED_HALF_HALF",
-                        help="Random initialization method.", choices=["GROW", "FULL", "RAMPED_HALF_HALF"])
-
-    # NCES only
-    parser.add_argument("--learner_names", type=str, nargs="+", default=["SetTransformer"], help="Learner name.",
-                        choices=["SetTransformer", "GRU", "LSTM"])
-    parser.add_argument("--proj_dim", type=int, default=128, help="Number of projection dimensions.")
-    parser.add_argument("--rnn_n_layers", type=int, default=2, help="Number of RNN layers (only for LSTM and GRU).")
-    parser.add_argument("--drop_prob", type=float, default=0.1, help="Drop probability.")
-    parser.add_argument("--num_heads", type=int, default=4, help="Number of heads")
-    parser.add_argument("--num_seeds", type=int, default=1, help="Number of seeds (only for SetTransformer).")
-    parser.add_argument("--m", type=int, default=32, help="Number of inducing points (only for SetTransformer).")
-    parser.add_argument("--ln", type=bool, default=False, help="Layer normalization (only for SetTransformer).")
-    parser.add_argument("--learning_rate", type=float, default=1e-4, help="Learning rate.")
-    parser.add_argument("--decay_rate", type=int, default=0, help="Decay rate.")
-    parser.add_argument("--clip_value", type=int, default=5, help="Clip value.")
-    parser.add_argument("--batch_size", type=int, default=256, help="Batch size")
-    parser.add_argument("--num_workers", type=int, default=8, help="Number of workers")
-    parser.add_argument("--max_length", type=int, default=48, help="Maximum length")
-    parser.add_argument("--load_pretrained", type=bool, default=True, help="Load pretrained.")
-    parser.add_argument("--sorted_examples", type=bool, default=True, help="Sorted examples.")
-   parser.add_argument("--pretrained_model_name", type=str, default="SetTransformer", help="Pretrained model name",
-                       choices=["SetTransformer", "GRU", "LSTM"])
 
+def get_default_arguments(description=None):
     if description is None:
-        return parser.parse_args()
-    return parser.parse_args(description)
+        return _PARSER.parse_args()
+    return _PARSER.parse_args(description)
 
 
 if __name__ == '__main__':
@@ -28,6 +28,7 @@ import logging
 from abc import ABCMeta, abstractmethod
 from typing import Set, List, Tuple, Iterable, TypeVar, Generic, ClassVar, Optional
 from collections import OrderedDict
+from itertools import islice
 from owlapy.class_expression import OWLClassExpression
 from owlapy.abstracts import AbstractOWLOntology
 from owlapy.owl_individual import OWLNamedIndividual
@@ -80,11 +81,11 @@ class AbstractScorer(Generic[_N], metaclass=ABCMeta):
         # @TODO: It must be moved to the top of the abstracts.py
         from ontolearn.learning_problem import EncodedPosNegLPStandard
         if isinstance(learning_problem, EncodedPosNegLPStandard):
+            # The differences follow from the intersections: two passes over the examples instead of four.
             tp = len(learning_problem.kb_pos.intersection(instances))
-            tn = len(learning_problem.kb_neg.difference(instances))
-
             fp = len(learning_problem.kb_neg.intersection(instances))
-            fn = len(learning_problem.kb_pos.difference(instances))
+            fn = len(learning_problem.kb_pos) - tp
+            tn = len(learning_problem.kb_neg) - fp
             return self.score2(tp=tp, tn=tn, fp=fp, fn=fn)
         else:
             raise NotImplementedError(learning_problem)
@@ -644,11 +645,7 @@ class DRILLAbstractTree:  # pragma: no cover
 
     def get_top_n_nodes(self, n: int, key='quality'):
         self.sort_search_tree_by_decreasing_order(key=key)
-        for ith, dict_ in enumerate(self._nodes.items()):
-            if ith >= n:
-                break
-            k, node = dict_
-            yield node
+        yield from islice(self._nodes.values(), n)
 
     def redundancy_check(self, n):
         if n in self._nodes:
@@ -663,17 +660,18 @@ class DRILLAbstractTree:  # pragma: no cover
     def add(self, *args, **kwargs):
         pass
 
+    # Sort key of the (str, node) items of the search tree for each supported metric.
+    _metric_key_map = {'heuristic': lambda kv: kv[1].heuristic,
+                       'quality': lambda kv: kv[1].quality,
+                       'length': lambda kv: len(kv[1])}
+
     def sort_search_tree_by_decreasing_order(self, *, key: str):
-        if key == 'heuristic':
-            sorted_x = sorted(self._nodes.items(), key=lambda kv: kv[1].heuristic, reverse=True)
-        elif key == 'quality':
-            sorted_x = sorted(self._nodes.items(), key=lambda kv: kv[1].quality, reverse=True)
-        elif key == 'length':
-            sorted_x = sorted(self._nodes.items(), key=lambda kv: len(kv[1]), reverse=True)
-        else:
+        try:
+            sort_key = self._metric_key_map[key]
+        except KeyError:
             raise ValueError('Wrong Key. Key must be heuristic, quality or concept_length')
 
-        self._nodes = OrderedDict(sorted_x)
+        self._nodes = OrderedDict(sorted(self._nodes.items(), key=sort_key, reverse=True))
 
     def best_hypotheses(self, n=10) -> List:
         assert self.search_tree is not None
@@ -27,7 +27,7 @@
 import logging
 import time
 from abc import ABCMeta, abstractmethod
-from typing import List, Tuple, Dict, Optional, Iterable, Generic, TypeVar, ClassVar, Final, Union, cast, Callable, Type
+from typing import List, Tuple, Dict, Optional, Iterable, TypeVar, ClassVar, Final, Union, cast, Callable, Type
 import numpy as np
 import pandas as pd
 
@@ -153,8 +153,10 @@ class BaseConceptLearner(metaclass=ABCMeta):
             self.max_runtime = 5
 
     def __sanity_checking(self):
-        assert self.quality_func
-        assert self.kb
+        if not self.quality_func:
+            raise ValueError("quality_func is required")
+        if not self.kb:
+            raise ValueError("knowledge_base is required")
 
     @abstractmethod
     def clean(self):
@@ -356,10 +358,11 @@ class BaseConceptLearner(metaclass=ABCMeta):
         manager.apply_change(AddImport(ontology, OWLImportsDeclaration(IRI.create('file://' + self.kb.path))))
         best = [self.best_hypotheses(n=n)] if n==1 else self.best_hypotheses(n=n)
 
+        # Collect the axioms of all hypotheses and add them to the ontology in one call.
+        axioms = []
         for ith, h in enumerate(best):
             cls_a: OWLClass = OWLClass(IRI.create(NS, "Pred_" + str(ith)))
-            equivalent_classes_axiom = OWLEquivalentClassesAxiom([cls_a, h])
-            ontology.add_axiom(equivalent_classes_axiom)
+            axioms.append(OWLEquivalentClassesAxiom([cls_a, h]))
             # @TODO:CD: We should find a way to include information (F1score etc) outside of OWL class expression instances
             """
             try:
@@ -376,6 +379,7 @@ class BaseConceptLearner(metaclass=ABCMeta):
                     OWLAnnotationProperty(IRI.create(SNS, "f1_score")), OWLLiteral(quality)))
                 ontology.add_axiom(f1_score)
             """
+        ontology.add_axiom(axioms)
         # TODO:# must be added for the time being
         ontology.save(IRI.create(path + '#.owl'))
 
@@ -481,8 +485,10 @@ class RefinementBasedConceptLearner(BaseConceptLearner):
             self.max_child_length = 10
 
         if self.operator is None:
-            assert isinstance(self.kb, KnowledgeBase)
+            if not isinstance(self.kb, KnowledgeBase):
+                raise TypeError("A refinement_operator is required if knowledge_base is not a KnowledgeBase")
             self.operator = ModifiedCELOERefinement(self.kb, max_child_length=self.max_child_length)
+            self.operator.build_pruning_table()
 
         if self.heuristic_func is None:
             self.heuristic_func = CELOEHeuristic()
@@ -493,9 +499,12 @@ class RefinementBasedConceptLearner(BaseConceptLearner):
             self.iter_bound = 10_000
 
     def __sanity_checking(self):
-        assert self.start_class
-        assert self.heuristic_func
-        assert self.operator
+        if not self.start_class:
+            raise ValueError("start_class is required")
+        if not self.heuristic_func:
+            raise ValueError("heuristic_func is required")
+        if not self.operator:
+            raise ValueError("refinement_operator is required")
 
     def terminate(self):
         self.show_search_tree('Final')
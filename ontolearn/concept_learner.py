@@ -30,6 +30,7 @@ import pandas as pd
 import numpy as np
 import torch
 from datetime import datetime
+from pathlib import Path
 from itertools import chain
 from typing import Any, Callable, Dict, FrozenSet, Set, List, Tuple, Iterable, Optional, Union
 from torch.utils.data import DataLoader
@@ -46,7 +47,7 @@ from ontolearn.abstracts import AbstractKnowledgeBase
 from ontolearn.abstracts import AbstractFitness, AbstractScorer, BaseRefinement, \
     AbstractHeuristic, AbstractNode
 from ontolearn.base_concept_learner import BaseConceptLearner
-from owlapy.utils import EvaluatedDescriptionSet, ConceptOperandSorter
+from owlapy.utils import ConceptOperandSorter
 from ontolearn.data_struct import (TriplesData, NCESDatasetInference, CLIPDataset, CLIPDatasetInference,
                                    ROCESDatasetInference)
 from ontolearn.ea_algorithms import AbstractEvolutionaryAlgorithm, EASimple
@@ -61,8 +62,7 @@ from ontolearn.refinement_operators import ExpressRefinement
 from ontolearn.utils import read_csv
 
 from ontolearn.utils.static_funcs import concept_len
-from ontolearn.quality_funcs import evaluate_concept
-from ontolearn.search import EvoLearnerNode, NCESNode, OENode, TreeNode, QualityOrderedNode
+from ontolearn.search import EvoLearnerNode, NCESNode, OENode
 from ontolearn.utils.static_funcs import init_length_metric, compute_tp_fn_fp_tn
 from ontolearn.value_splitter import AbstractValueSplitter, BinningValueSplitter, EntropyValueSplitter
 from ontolearn.base_nces import BaseNCES
@@ -72,7 +72,6 @@ from ontolearn.clip_architectures import LengthLearner_LSTM, LengthLearner_GRU,
 from ontolearn.nces_trainer import NCESTrainer, before_pad
 from ontolearn.clip_trainer import CLIPTrainer
 from ontolearn.nces_utils import SimpleSolution, generate_training_data
-from sortedcontainers import SortedSet
 import os
 import json
 import glob
@@ -484,15 +483,17 @@ class EvoLearner(BaseConceptLearner):
     def _fitness_func(self, individual: Tree):
         ind_str = ind_to_string(individual)
         # experimental
-        if ind_str in self._cache:
-            individual.quality.values = (self._cache[ind_str][0],)
-            individual.fitness.values = (self._cache[ind_str][1],)
+        cached = self._cache.get(ind_str)
+        if cached is not None:
+            individual.quality.values = (cached[0],)
+            individual.fitness.values = (cached[1],)
         else:
             concept = gp.compile(individual, self.pset)
-            e = evaluate_concept(self.kb, concept, self.quality_func, self._learning_problem)
-            individual.quality.values = (e.q,)
+            # Only the quality is needed, scoring the instances directly spares an EvaluatedConcept per individual.
+            _, q = self.quality_func.score_elp(self.kb.individuals_set(concept), self._learning_problem)
+            individual.quality.values = (q,)
             self.fitness_func.apply(individual)
-            self._cache[ind_str] = (e.q, individual.fitness.values[0])
+            self._cache[ind_str] = (q, individual.fitness.values[0])
             self._number_of_tested_concepts += 1
 
     def clean(self, partial: bool = False):
@@ -531,7 +532,7 @@ class CLIP(CELOE):
         best_only (bool): If False pick only nodes with quality < 1.0, else pick without quality restrictions.
         calculate_min_max (bool): Calculate minimum and maximum horizontal expansion? Statistical purpose only.
         heuristic_func (AbstractHeuristic): Function to guide the search heuristic.
-        heuristic_queue (SortedSet[OENode]): A sorted set that compares the nodes based on Heuristic.
+        heuristic_queue (HeuristicQueue[OENode]): A max-heap that orders the nodes based on Heuristic.
         iter_bound (int): Limit to stop the algorithm after n refinement steps are done.
         kb (AbstractKnowledgeBase): The knowledge base that the concept learner is using.
         max_child_length (int): Limit the length of concepts generated by the refinement operator.
@@ -784,7 +785,7 @@ class CLIP(CELOE):
         train_dataloader = DataLoader(train_dataset, batch_size=batch_size, num_workers=self.num_workers,
                                       collate_fn=self.collate_batch, shuffle=True)
         if storage_path is None:
-            storage_path = self.knowledge_base_path[:self.knowledge_base_path.rfind("/")]
+            storage_path = str(Path(self.knowledge_base_path).parent)
         elif not os.path.exists(storage_path) and (record_runtime or save_model):
             os.mkdir(storage_path)
         trainer = CLIPTrainer(self, epochs=epochs, learning_rate=learning_rate, decay_rate=decay_rate,
@@ -25,9 +25,6 @@
 """Data structures."""
 
 import torch
-import torch.nn.functional as F
-from torch.nn.utils.rnn import pad_sequence
-from collections import deque
 import pandas as pd
 import numpy as np
 import random
@@ -41,11 +38,12 @@ class PrepareBatchOfPrediction(torch.utils.data.Dataset):  # pragma: no cover
                  n: torch.FloatTensor):
         assert len(p) > 0 and len(n) > 0
         num_next_states = len(next_state_batch)
-        current_state = current_state.repeat(num_next_states, 1, 1)
-        p = p.repeat((num_next_states, 1, 1))
-        n = n.repeat((num_next_states, 1, 1))
-        # batch, 4, dim
-        self.X = torch.cat([current_state, next_state_batch, p, n], 1)
+        # batch, 4, dim: written into a single allocation, the (1, 1, dim) inputs are broadcast over the batch.
+        self.X = torch.empty((num_next_states, 4, next_state_batch.shape[2]), dtype=next_state_batch.dtype)
+        self.X[:, 0:1] = current_state
+        self.X[:, 1:2] = next_state_batch
+        self.X[:, 2:3] = p
+        self.X[:, 3:4] = n
 
     def __len__(self):
         return len(self.X)
@@ -116,17 +114,22 @@ class PrepareBatchOfTraining(torch.utils.data.Dataset):  # pragma: no cover
 class Experience:  # pragma: no cover
     """
     A class to model experiences for Replay Memory.
+
+    Experiences are written into preallocated ring buffers, once the memory is full the oldest experience is
+    overwritten. The buffers are allocated at the first append, when the embedding dimension is known.
     """
 
     def __init__(self, maxlen: int):
         # @TODO we may want to not forget experiences yielding high rewards
-        self.current_states = deque(maxlen=maxlen)
-        self.next_states = deque(maxlen=maxlen)
-        self.rewards = deque(maxlen=maxlen)
+        self.maxlen = maxlen
+        # maxlen x 2 x dim: embeddings of the current and of the next state
+        self.states = None
+        self.rewards = None
+        self._write = 0
+        self._size = 0
 
     def __len__(self):
-        assert len(self.current_states) == len(self.next_states) == len(self.rewards)
-        return len(self.current_states)
+        return self._size
 
     def append(self, e):
         """
@@ -135,22 +138,33 @@ class Experience:  # pragma: no cover
             e: A tuple of s_i, s_j and reward, where s_i and s_j represent refining s_i and reaching s_j.
 
         """
-        assert len(self.current_states) == len(self.next_states) == len(self.rewards)
         s_i, s_j, r = e
         assert s_i.embeddings.shape == s_j.embeddings.shape
-        self.current_states.append(s_i.embeddings)
-        self.next_states.append(s_j.embeddings)
-        self.rewards.append(r)
+        if self.states is None:
+            self.states = torch.empty(self.maxlen, 2, s_i.embeddings.numel(), dtype=s_i.embeddings.dtype)
+            self.rewards = torch.empty(self.maxlen)
+        self.states[self._write, 0] = s_i.embeddings.view(-1)
+        self.states[self._write, 1] = s_j.embeddings.view(-1)
+        self.rewards[self._write] = r
+        self._write = (self._write + 1) % self.maxlen
+        self._size = min(self._size + 1, self.maxlen)
 
     def retrieve(self):
-        return list(self.current_states), list(self.next_states), list(self.rewards)
+        """
+        Retrieve the stored experiences as views on the ring buffers (no copy).
+
+        Returns:
+            Embeddings of the current states (N, 1, dim), of the next states (N, 1, dim) and the rewards (N).
+        """
+        if self.states is None:
+            return torch.empty(0, 1, 0), torch.empty(0, 1, 0), torch.empty(0)
+        return self.states[:self._size, 0:1], self.states[:self._size, 1:2], self.rewards[:self._size]
 
     def clear(self):
-        self.current_states.clear()
-        self.next_states.clear()
-        self.rewards.clear()
-        
-        
+        self._write = 0
+        self._size = 0
+
+
 class TriplesData:
     def __init__(self, knowledge_base_path):
         
@@ -192,6 +206,15 @@ class TriplesData:
         return entities
     
         
+def _embedding_table(embeddings: pd.DataFrame):
+    """Dense float32 matrix of an embedding data frame and the row of each individual in it.
+
+    Gathering rows by position avoids the label alignment of `DataFrame.loc` for every data point.
+    """
+    return (np.ascontiguousarray(embeddings.values, dtype=np.float32),
+            {ind: row for row, ind in enumerate(embeddings.index)})
+
+
 class CLIPDataset(torch.utils.data.Dataset):  # pragma: no cover
 
     def __init__(self, data, embeddings, num_examples, shuffle_examples, example_sizes=None,
@@ -204,6 +227,7 @@ class CLIPDataset(torch.utils.data.Dataset):  # pragma: no cover
         self.example_sizes = example_sizes
         self.k = k
         self.sorted_examples = sorted_examples
+        self._emb_np, self._ind_to_row = _embedding_table(embeddings)
 
     def __len__(self):
         return len(self.data)
@@ -236,8 +260,8 @@ class CLIPDataset(torch.utils.data.Dataset):  # pragma: no cover
             random.shuffle(selected_pos)
             random.shuffle(selected_neg)
             
-        datapoint_pos = torch.FloatTensor(self.embeddings.loc[selected_pos].values.squeeze())
-        datapoint_neg = torch.FloatTensor(self.embeddings.loc[selected_neg].values.squeeze())
+        datapoint_pos = torch.from_numpy(self._emb_np[[self._ind_to_row[ind] for ind in selected_pos]].squeeze())
+        datapoint_neg = torch.from_numpy(self._emb_np[[self._ind_to_row[ind] for ind in selected_neg]].squeeze())
         
         return datapoint_pos, datapoint_neg, torch.LongTensor([length])
     
@@ -326,6 +350,7 @@ class NCESDataset(NCESBaseDataset, torch.utils.data.Dataset):  # pragma: no cove
         self.shuffle_examples = shuffle_examples
         self.example_sizes = example_sizes
         self.sorted_examples = sorted_examples
+        self._emb_np, self._ind_to_row = _embedding_table(embeddings)
 
     def __len__(self):
         return len(self.data)
@@ -348,8 +373,8 @@ class NCESDataset(NCESBaseDataset, torch.utils.data.Dataset):  # pragma: no cove
         labels, length = self.get_labels(key)
 
         try:
-            datapoint_pos = torch.FloatTensor(self.embeddings.loc[selected_pos].values.squeeze())
-            datapoint_neg = torch.FloatTensor(self.embeddings.loc[selected_neg].values.squeeze())
+            datapoint_pos = torch.from_numpy(self._emb_np[[self._ind_to_row[ind] for ind in selected_pos]].squeeze())
+            datapoint_neg = torch.from_numpy(self._emb_np[[self._ind_to_row[ind] for ind in selected_neg]].squeeze())
         except Exception as e:
             print(e)
             return None
@@ -459,12 +484,26 @@ class ROCESDatasetInference(NCESBaseDataset, torch.utils.data.Dataset):
     def load_embeddings(self, embedding_model):
         embeddings, _ = embedding_model.get_embeddings()
         self.embeddings = embeddings.detach().cpu()
+        # An extra zero row at the end serves as padding, short samples point to it instead of being padded.
+        self._padded_embeddings = torch.cat([self.embeddings, self.embeddings.new_zeros((1, self.embeddings.shape[1]))])
         
     def set_k(self, k):
         self.k = k
 
     def __len__(self):
         return len(self.data)
+
+    def _sample_embeddings(self, examples, sizes):
+        """Embeddings of `num_pred_per_lp` samples of the examples, zero padded to a common number of examples.
+
+        Returns:
+            A (num_pred_per_lp, max(num_examples, max(sizes)), d) tensor.
+        """
+        rows = self.triples_data.entity2idx.loc[examples].values.reshape(-1)
+        index = np.full((len(sizes), max(self.num_examples, max(sizes))), len(self.embeddings))
+        for i, k in enumerate(sizes):
+            index[i, :k] = np.random.choice(rows, k, replace=False)
+        return self._padded_embeddings[torch.from_numpy(index)]
     
     def __getitem__(self, idx):
         _, pos, neg = self.data[idx]
@@ -484,17 +523,8 @@ class ROCESDatasetInference(NCESBaseDataset, torch.utils.data.Dataset):
             k_pos = np.random.choice(range(min(self.k, len(pos)), len(pos)+1, self.k), size=(self.num_pred_per_lp,), replace=True)
             k_neg = np.random.choice(range(min(self.k, len(neg)), len(neg)+1, self.k), size=(self.num_pred_per_lp,), replace=True)
             
-        selected_pos = [random.sample(pos, k) for k in k_pos]
-        selected_neg = [random.sample(neg, k) for k in k_neg]
-        
-        pos_emb_list = [self.embeddings[self.triples_data.entity2idx.loc[pos_ex].values.squeeze()] for pos_ex in selected_pos]
-        neg_emb_list = [self.embeddings[self.triples_data.entity2idx.loc[neg_ex].values.squeeze()] for neg_ex in selected_neg]
-        
-        pos_emb_list[0] = F.pad(pos_emb_list[0], (0, 0, 0, self.num_examples - pos_emb_list[0].shape[0]), "constant", 0)
-        pos_emb_list = pad_sequence(pos_emb_list, batch_first=True, padding_value=0)
-        
-        neg_emb_list[0] = F.pad(neg_emb_list[0], (0, 0, 0, self.num_examples - neg_emb_list[0].shape[0]), "constant", 0)
-        neg_emb_list = pad_sequence(neg_emb_list, batch_first=True, padding_value=0)
+        pos_emb_list = self._sample_embeddings(pos, k_pos)
+        neg_emb_list = self._sample_embeddings(neg, k_neg)
         
         return pos_emb_list, neg_emb_list
         
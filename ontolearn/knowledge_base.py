@@ -25,12 +25,14 @@
 """ Knowledge Base."""
 
 import logging
-from collections import Counter
-from typing import Iterable, Optional, Callable, Union, FrozenSet, Set, Dict, cast, Generator
+from collections import Counter, OrderedDict
+from itertools import filterfalse
+import numpy as np
+from typing import Iterable, Optional, Callable, Union, FrozenSet, Set, Dict, cast, Generator, Tuple, List
 import owlapy
 from owlapy import OntologyManager
 from owlapy.class_expression import OWLClassExpression, OWLClass, OWLObjectSomeValuesFrom, OWLObjectAllValuesFrom, \
-    OWLThing, OWLObjectMinCardinality, OWLObjectOneOf
+    OWLThing, OWLObjectMinCardinality, OWLObjectOneOf, OWLObjectIntersectionOf
 from owlapy.iri import IRI
 from owlapy.owl_axiom import OWLClassAssertionAxiom, OWLObjectPropertyAssertionAxiom, OWLDataPropertyAssertionAxiom, \
     OWLSubClassOfAxiom, OWLEquivalentClassesAxiom
@@ -60,6 +62,146 @@ def depth_Default_ReasonerFactory(onto: AbstractOWLOntology) -> AbstractOWLReaso
     return StructuralReasoner(onto)
 
 
+class _AdaptiveLRUCache:
+    """LRU cache of a function of one argument, which grows when it thrashes.
+
+    Every `resize_period` lookups, if more than half of them were misses, the maximum size is doubled, up to
+    `soft_cap`. The entries are kept on growth.
+
+    Args:
+        func: The function to cache, it must not return None.
+        maxsize: Initial maximum number of entries.
+        soft_cap: Maximum number of entries the cache can grow to.
+        resize_period: Number of lookups after which the miss rate is checked.
+    """
+    __slots__ = 'func', 'maxsize', 'soft_cap', 'resize_period', '_entries', '_hits', '_misses'
+
+    def __init__(self, func: Callable, maxsize: int, soft_cap: int, resize_period: int):
+        self.func = func
+        self.maxsize = maxsize
+        self.soft_cap = max(soft_cap, maxsize)
+        self.resize_period = resize_period
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def __call__(self, key):
+        entries = self._entries
+        value = entries.get(key)
+        if value is not None:
+            entries.move_to_end(key)
+            self._hits += 1
+        else:
+            value = entries[key] = self.func(key)
+            self._misses += 1
+            if len(entries) > self.maxsize:
+                entries.popitem(last=False)
+        if self._hits + self._misses >= self.resize_period:
+            if self._misses > self._hits and self.maxsize < self.soft_cap:
+                self.maxsize = min(2 * self.maxsize, self.soft_cap)
+            self._hits = self._misses = 0
+        return value
+
+    def cache_clear(self):
+        self._entries.clear()
+        self._hits = self._misses = 0
+
+
+class _IgnoringHierarchyView:
+    """Read-only view of a class or property hierarchy that leaves out the ignored entities.
+
+    Answers the queries the same way as the hierarchy returned by ``restrict_and_copy(remove=ignored)``, but filters
+    the results of the wrapped hierarchy on the fly instead of rebuilding it. The direct neighbours of an entity are
+    computed on the first query and memoized, since bridging an ignored neighbour walks all descendants (or ancestors)
+    of the entity. Queries that are not overridden here are delegated to the wrapped hierarchy unchanged.
+
+    Args:
+        hierarchy: The hierarchy to wrap.
+        ignored: Entities to leave out.
+    """
+    __slots__ = '_hierarchy', '_ignored', '_direct_cache'
+
+    def __init__(self, hierarchy, ignored: Iterable):
+        self._hierarchy = hierarchy
+        self._ignored = frozenset(ignored)
+        # (entity, downward) -> direct children (downward) or parents of the entity, ignored ones bridged
+        self._direct_cache = dict()
+
+    def __getattr__(self, name):
+        return getattr(self._hierarchy, name)
+
+    def __contains__(self, entity) -> bool:
+        return entity not in self._ignored and entity in self._hierarchy
+
+    def __len__(self) -> int:
+        return iter_count(self.items())
+
+    def items(self):
+        return filterfalse(self._ignored.__contains__, self._hierarchy.items())
+
+    def _direct(self, entity, downward: bool):
+        found = self._direct_cache.get((entity, downward))
+        if found is None:
+            down, up = (self._hierarchy.children, self._hierarchy.parents) if downward \
+                else (self._hierarchy.parents, self._hierarchy.children)
+            found = tuple(down(entity, direct=True))
+            if not self._ignored.isdisjoint(found):
+                # an ignored neighbour is bridged: the entities behind it become direct unless something else is in
+                # between
+                below = set(filterfalse(self._ignored.__contains__, down(entity, direct=False)))
+                found = tuple(e for e in below if below.isdisjoint(up(e, direct=False)))
+            self._direct_cache[(entity, downward)] = found
+        return iter(found)
+
+    def children(self, entity, direct: bool = True):
+        if direct:
+            return self._direct(entity, True)
+        return filterfalse(self._ignored.__contains__, self._hierarchy.children(entity, direct=False))
+
+    def parents(self, entity, direct: bool = True):
+        if direct:
+            return self._direct(entity, False)
+        return filterfalse(self._ignored.__contains__, self._hierarchy.parents(entity, direct=False))
+
+    def _extremes(self, found, scope, outward):
+        seen = set()
+        for e in filterfalse(self._ignored.__contains__, found):
+            seen.add(e)
+            yield e
+        for e in filterfalse(self._ignored.__contains__, scope):
+            if e not in seen and self._ignored.issuperset(outward(e, direct=False)):
+                yield e
+
+    def roots(self, of=None):
+        scope = self._hierarchy.items() if of is None else self._hierarchy.parents(of, direct=False)
+        return self._extremes(self._hierarchy.roots(of), scope, self._hierarchy.parents)
+
+    def leaves(self, of=None):
+        scope = self._hierarchy.items() if of is None else self._hierarchy.children(of, direct=False)
+        return self._extremes(self._hierarchy.leaves(of), scope, self._hierarchy.children)
+
+    def sub_classes(self, entity, direct: bool = True):
+        return self.children(entity, direct)
+
+    def super_classes(self, entity, direct: bool = True):
+        return self.parents(entity, direct)
+
+    def more_special_roles(self, role, direct: bool = True):
+        return self.children(role, direct)
+
+    def more_general_roles(self, role, direct: bool = True):
+        return self.parents(role, direct)
+
+    def most_general_roles(self):
+        return self.roots()
+
+    def most_special_roles(self):
+        return self.leaves()
+
+    def restrict_and_copy(self, *, remove: Iterable):
+        return self._hierarchy.restrict_and_copy(remove=self._ignored.union(remove))
+
+
 class KnowledgeBase(AbstractKnowledgeBase):
     """Representation of an OWL knowledge base in Ontolearn.
 
@@ -72,6 +214,13 @@ class KnowledgeBase(AbstractKnowledgeBase):
             argument it will override this setting.
         include_implicit_individuals: Whether to identify and consider instances which are not set as OWL Named
             Individuals (does not contain this type) as individuals.
+        individuals_cache_size: How many class expressions to keep the retrieved individuals of (0 to disable).
+        individuals_cache_soft_cap: How many class expressions the individuals cache can grow to when most lookups
+            miss.
+        individuals_cache_resize_period: Number of lookups in the individuals cache after which its miss rate is
+            checked.
+        precompute_named_class_instances: Whether to retrieve the individuals of every named class when loading the
+            knowledge base. Otherwise, they are retrieved on first use. They are kept in both cases.
 
     Attributes:
         generator (ConceptGenerator): Instance of concept generator.
@@ -95,7 +244,11 @@ class KnowledgeBase(AbstractKnowledgeBase):
                  load_class_hierarchy: bool = True,
                  object_property_hierarchy: Optional[ObjectPropertyHierarchy] = None,
                  data_property_hierarchy: Optional[DatatypePropertyHierarchy] = None,
-                 include_implicit_individuals=False):
+                 include_implicit_individuals=False,
+                 individuals_cache_size: int = 128,
+                 precompute_named_class_instances: bool = True,
+                 individuals_cache_soft_cap: int = 4096,
+                 individuals_cache_resize_period: int = 10000):
         AbstractKnowledgeBase.__init__(self)
 
         assert path is not None or (ontology is not None and reasoner is not None), ("You should either provide a path "
@@ -138,6 +291,26 @@ class KnowledgeBase(AbstractKnowledgeBase):
         self.dp_domains = dict()
         self.dp_ranges: Dict[OWLDataProperty, FrozenSet[OWLDataRange]]
         self.dp_ranges = dict()
+        # Individuals of recently retrieved class expressions.
+        self._cached_instances: Callable[[OWLClassExpression], FrozenSet[OWLNamedIndividual]]
+        if individuals_cache_size > 0:
+            self._cached_instances = _AdaptiveLRUCache(self._instances, individuals_cache_size,
+                                                       individuals_cache_soft_cap, individuals_cache_resize_period)
+        else:
+            self._cached_instances = self._instances
+        # Individuals of named classes, kept apart from the LRU cache so that they are never evicted.
+        self._class_instances: Dict[OWLClass, FrozenSet[OWLNamedIndividual]] = dict()
+        if precompute_named_class_instances:
+            for cls in self.ontology.classes_in_signature():
+                self._class_instances[cls] = self._instances(cls)
+        # All individuals in the signature, collected on first use.
+        self._ind_set: Optional[FrozenSet[OWLNamedIndividual]] = None
+        # Bit of each individual in the integer bitmasks used for set operations, built on first use.
+        self._ind_index: Optional[Dict[OWLNamedIndividual, int]] = None
+        # Boolean masks (one row per property) of the individuals of property domains and ranges, by domains.
+        self._domain_masks: Dict[Tuple[OWLClassExpression, ...], np.ndarray] = dict()
+        # Number of classes, properties and individuals in the signature, counted on the first __repr__.
+        self._sig_counts: Optional[Tuple[int, int, int]] = None
         # OWL class expression generator
         self.generator = ConceptGenerator()
         self.describe()
@@ -152,9 +325,46 @@ class KnowledgeBase(AbstractKnowledgeBase):
         """
         # named_individuals check must be supported by the reasoner .instances method
         if concept:
-            return frozenset(self.reasoner.instances(concept))
-        else:
-            return frozenset(self.ontology.individuals_in_signature())
+            if isinstance(concept, OWLClass):
+                inds = self._class_instances.get(concept)
+                if inds is None:
+                    inds = self._class_instances[concept] = self._instances(concept)
+                return inds
+            return self._cached_instances(concept)
+        if self._ind_set is None:
+            self._ind_set = frozenset(self.ontology.individuals_in_signature())
+        return self._ind_set
+
+    def _instances(self, concept: OWLClassExpression) -> FrozenSet[OWLNamedIndividual]:
+        if isinstance(concept, OWLObjectIntersectionOf):
+            # The instances of an intersection are exactly those of all its operands, which are likely cached.
+            return frozenset.intersection(*map(self.individuals, concept.operands()))
+        return frozenset(self.reasoner.instances(concept))
+
+    def _cache_individuals_batch(self, ces: Iterable[OWLClassExpression]) -> List[FrozenSet[OWLNamedIndividual]]:
+        """Retrieve the individuals of several class expressions at once.
+
+        Intersections are answered from their operands, and an operand shared by several of the class expressions
+        is retrieved only once for the whole batch, even if it does not fit in the individuals cache.
+
+        Args:
+            ces: Class expressions of which to retrieve the individuals.
+        Returns:
+            The individuals of each class expression, in the given order.
+        """
+        batch = dict()
+
+        def retrieve(ce: OWLClassExpression) -> FrozenSet[OWLNamedIndividual]:
+            inds = batch.get(ce)
+            if inds is None:
+                if isinstance(ce, OWLObjectIntersectionOf):
+                    inds = frozenset.intersection(*map(retrieve, ce.operands()))
+                else:
+                    inds = self.individuals(ce)
+                batch[ce] = inds
+            return inds
+
+        return [retrieve(ce) for ce in ces]
 
     def abox(self, individual: Union[OWLNamedIndividual, Iterable[OWLNamedIndividual]] = None, mode='native'):  # pragma: no cover
         """
@@ -412,7 +622,52 @@ class KnowledgeBase(AbstractKnowledgeBase):
         Returns:
             A new KnowledgeBase with the hierarchies restricted as requested.
         """
+        new = self._shallow_copy()
+        if ignored_classes is not None:
+            new.class_hierarchy = self.class_hierarchy.restrict_and_copy(
+                remove=self._classes_to_ignore(ignored_classes))
+        if ignored_object_properties is not None:
+            new.object_property_hierarchy = self.object_property_hierarchy.restrict_and_copy(
+                remove=ignored_object_properties)
+        if ignored_data_properties is not None:
+            new.data_property_hierarchy = self.data_property_hierarchy.restrict_and_copy(
+                remove=ignored_data_properties)
+        return new
+
+    def ignore_and_view(self, ignored_classes: Optional[Iterable[OWLClass]] = None,
+                        ignored_object_properties: Optional[Iterable[OWLObjectProperty]] = None,
+                        ignored_data_properties: Optional[Iterable[OWLDataProperty]] = None) -> 'KnowledgeBase':
+        """Same as :meth:`ignore_and_copy`, but the hierarchies of the new knowledge base are views that filter out the
+        ignored entities on the fly instead of restricted copies. Creating the view is cheap regardless of the
+        ontology size; the cost of bridging the ignored entities is paid on the first query of each neighbouring
+        entity instead.
+
+        Note:
+            The new knowledge base shares the retrieval caches of this one, so :meth:`clean` on either of them clears
+            the caches of both.
+
+        Args:
+            ignored_classes: Classes to ignore.
+            ignored_object_properties: Object properties to ignore.
+            ignored_data_properties: Data properties to ignore.
+        Returns:
+            A new KnowledgeBase sharing the hierarchies and caches of this one.
+        """
+        new = self._shallow_copy()
+        if ignored_classes is not None:
+            new.class_hierarchy = _IgnoringHierarchyView(self.class_hierarchy,
+                                                         self._classes_to_ignore(ignored_classes))
+        if ignored_object_properties is not None:
+            new.object_property_hierarchy = _IgnoringHierarchyView(self.object_property_hierarchy,
+                                                                   ignored_object_properties)
+        if ignored_data_properties is not None:
+            new.data_property_hierarchy = _IgnoringHierarchyView(self.data_property_hierarchy,
+                                                                 ignored_data_properties)
+        return new
 
+    def _shallow_copy(self) -> 'KnowledgeBase':
+        # The retrieval caches are shared, not copied: the individuals of a class expression do not depend on the
+        # ignored entities. clean() on the copy therefore clears the caches of this knowledge base as well.
         new = object.__new__(KnowledgeBase)
 
         AbstractKnowledgeBase.__init__(new)
@@ -425,38 +680,33 @@ class KnowledgeBase(AbstractKnowledgeBase):
         new.op_ranges = self.op_ranges
         new.dp_domains = self.dp_domains
         new.dp_ranges = self.dp_ranges
-
-
-        if ignored_classes is not None:
-            owl_concepts_to_ignore = set()
-            for i in ignored_classes:
-                if self.contains_class(i):
-                    owl_concepts_to_ignore.add(i)
-                else:
-                    raise ValueError(
-                        f'{i} could not found in \n{self} \n'
-                        f'{[_ for _ in self.ontology.classes_in_signature()]}.')
-            if logger.isEnabledFor(logging.INFO):
-                r = DLSyntaxObjectRenderer()
-                logger.info('Concepts to ignore: {0}'.format(' '.join(map(r.render, owl_concepts_to_ignore))))
-            new.class_hierarchy = self.class_hierarchy.restrict_and_copy(remove=owl_concepts_to_ignore)
-        else:
-            new.class_hierarchy = self.class_hierarchy
-
-        if ignored_object_properties is not None:
-            new.object_property_hierarchy = self.object_property_hierarchy.restrict_and_copy(
-                remove=ignored_object_properties)
-        else:
-            new.object_property_hierarchy = self.object_property_hierarchy
-
-        if ignored_data_properties is not None:
-            new.data_property_hierarchy = self.data_property_hierarchy.restrict_and_copy(
-                remove=ignored_data_properties)
-        else:
-            new.data_property_hierarchy = self.data_property_hierarchy
-
+        new._cached_instances = self._cached_instances
+        new._class_instances = self._class_instances
+        new._ind_set = self._ind_set
+        # The domain masks are shared, so the index of their columns must be too: built here, the copy and this
+        # knowledge base give the same ids to the implicit individuals they meet later.
+        new._ind_index = self._individual_index()
+        new._domain_masks = self._domain_masks
+        new._sig_counts = self._sig_counts
+        new.class_hierarchy = self.class_hierarchy
+        new.object_property_hierarchy = self.object_property_hierarchy
+        new.data_property_hierarchy = self.data_property_hierarchy
         return new
 
+    def _classes_to_ignore(self, ignored_classes: Iterable[OWLClass]) -> Set[OWLClass]:
+        owl_concepts_to_ignore = set()
+        for i in ignored_classes:
+            if self.contains_class(i):
+                owl_concepts_to_ignore.add(i)
+            else:
+                raise ValueError(
+                    f'{i} could not found in \n{self} \n'
+                    f'{[_ for _ in self.ontology.classes_in_signature()]}.')
+        if logger.isEnabledFor(logging.INFO):
+            r = DLSyntaxObjectRenderer()
+            logger.info('Concepts to ignore: {0}'.format(' '.join(map(r.render, owl_concepts_to_ignore))))
+        return owl_concepts_to_ignore
+
     def clean(self):
         """Clean all stored values (states and caches) if there is any.
 
@@ -469,6 +719,12 @@ class KnowledgeBase(AbstractKnowledgeBase):
         """
 
         self.op_domains.clear()
+        self._domain_masks.clear()
+        self._sig_counts = None
+        self._ind_set = None
+        self._class_instances.clear()
+        if hasattr(self._cached_instances, 'cache_clear'):
+            self._cached_instances.cache_clear()
 
     # def cache_individuals(self, ce: OWLClassExpression) -> None:
     #     if not self.use_individuals_cache:
@@ -491,7 +747,8 @@ class KnowledgeBase(AbstractKnowledgeBase):
         Returns:
             Number of the individuals belonging to the given class.
         """
-        return len(set(self.individuals(concept)))
+        # individuals() already returns a frozenset, no copy is needed to count it.
+        return len(self.individuals(concept))
 
     def individuals_set(self,
                         arg: Union[Iterable[OWLNamedIndividual], OWLNamedIndividual, OWLClassExpression]) -> FrozenSet:
@@ -505,7 +762,8 @@ class KnowledgeBase(AbstractKnowledgeBase):
         """
 
         if isinstance(arg, OWLClassExpression):
-            return frozenset(self.individuals(arg))
+            # Already a frozenset (the cached one if any), returned without a copy.
+            return self.individuals(arg)
             # if self.use_individuals_cache:
             #     self.cache_individuals(arg)
             #     r = self.ind_cache[arg]
@@ -514,9 +772,56 @@ class KnowledgeBase(AbstractKnowledgeBase):
             #     return frozenset(self.individuals(arg))
         elif isinstance(arg, OWLNamedIndividual):
             return frozenset({arg})
+        elif isinstance(arg, frozenset):
+            return arg
         else:
             return frozenset(arg)
 
+    def _individual_index(self) -> Dict[OWLNamedIndividual, int]:
+        if self._ind_index is None:
+            self._ind_index = {ind: i for i, ind in enumerate(self.ontology.individuals_in_signature())}
+        return self._ind_index
+
+    def _individual_ids(self, arg: Union[Iterable[OWLNamedIndividual], OWLClassExpression]) -> np.ndarray:
+        """Get the integer ids of individuals, which are also their columns in the domain masks of
+        `_properties_covering`.
+
+        Ids are assigned once per knowledge base, in the order of the individuals in the signature. Individuals that
+        are not part of the signature (implicit individuals returned by the reasoner) get the next free id.
+
+        Args:
+            arg: Individuals, or class expression of which to get the individuals.
+        Returns:
+            The ids of the individuals as int32 array.
+        """
+        if isinstance(arg, OWLClassExpression):
+            arg = self.individuals(arg)
+        index = self._individual_index()
+        return np.fromiter((index.setdefault(ind, len(index)) for ind in arg), dtype=np.int32)
+
+    def _properties_covering(self, domain: OWLClassExpression, properties: Iterable, func: Callable) -> list:
+        """Properties whose domain (or range), as given by `func`, contains all the individuals of `domain`.
+
+        The individuals of the property domains are kept as a (properties x individuals) boolean matrix, so that all
+        the properties are tested at once by looking only at the columns of the individuals of `domain`.
+        """
+        properties = list(properties)
+        if not properties:
+            return properties
+        domains = tuple(map(func, properties))
+        masks = self._domain_masks.get(domains)
+        if masks is None:
+            rows = list(map(self._individual_ids, self._cache_individuals_batch(domains)))
+            masks = np.zeros((len(rows), len(self._ind_index)), dtype=bool)
+            for i, ids in enumerate(rows):
+                masks[i, ids] = True
+            self._domain_masks[domains] = masks
+        ids = self._individual_ids(domain)
+        if ids.size and ids.max() >= masks.shape[1]:
+            # some individual of the domain was not seen in any property domain
+            return []
+        return [properties[i] for i in np.flatnonzero(masks[:, ids].all(axis=1))]
+
     def most_general_object_properties(self, *, domain: OWLClassExpression, inverse: bool = False) \
             -> Iterable[OWLObjectProperty]:
         """Find the most general object property.
@@ -529,19 +834,19 @@ class KnowledgeBase(AbstractKnowledgeBase):
         func: Callable
         func = self.get_object_property_ranges if inverse else self.get_object_property_domains
 
-        inds_domain = self.individuals_set(domain)
-        for prop in self.object_property_hierarchy.most_general_roles():
-            if domain.is_owl_thing() or inds_domain <= self.individuals_set(func(prop)):
-                yield prop
+        if domain.is_owl_thing():
+            yield from self.object_property_hierarchy.most_general_roles()
+            return
+        yield from self._properties_covering(domain, self.object_property_hierarchy.most_general_roles(), func)
 
     def data_properties_for_domain(self, domain: OWLClassExpression, data_properties: Iterable[OWLDataProperty]) \
             -> Iterable[OWLDataProperty]:
         assert isinstance(domain, OWLClassExpression)
         # TODO AB: It is unclear what this method is supposed to do and why is it implemented this way.
-        inds_domain = self.individuals_set(domain)
-        for prop in data_properties:
-            if domain.is_owl_thing() or inds_domain <= self.individuals_set(self.get_data_property_domains(prop)):
-                yield prop
+        if domain.is_owl_thing():
+            yield from data_properties
+            return
+        yield from self._properties_covering(domain, data_properties, self.get_data_property_domains)
 
     def least_general_named_concepts(self) -> Generator[OWLClass, None, None]:
         """Get leaf classes.
@@ -970,10 +1275,12 @@ class KnowledgeBase(AbstractKnowledgeBase):
         return concept in self.class_hierarchy
 
     def __repr__(self):
-        properties_count = iter_count(self.ontology.object_properties_in_signature()) + iter_count(
-            self.ontology.data_properties_in_signature())
-        class_count = iter_count(self.ontology.classes_in_signature())
-        individuals_count = self.individuals_count()
+        if self._sig_counts is None:
+            properties_count = iter_count(self.ontology.object_properties_in_signature()) + iter_count(
+                self.ontology.data_properties_in_signature())
+            class_count = iter_count(self.ontology.classes_in_signature())
+            self._sig_counts = (class_count, properties_count, self.individuals_count())
+        class_count, properties_count, individuals_count = self._sig_counts
 
         return f'KnowledgeBase(path={repr(self.path)} <{class_count} classes, {properties_count} properties, ' \
                f'{individuals_count} individuals)'
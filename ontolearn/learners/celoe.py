@@ -27,24 +27,45 @@ from ..base_concept_learner import RefinementBasedConceptLearner
 from ..abstracts import AbstractScorer, BaseRefinement, AbstractHeuristic, EncodedPosNegLPStandardKind, \
     AbstractKnowledgeBase
 from ..learning_problem import PosNegLPStandard
-from ..quality_funcs import evaluate_concept
-from ..search import OENode, TreeNode, EvaluatedConcept, HeuristicOrderedNode, QualityOrderedNode, LengthOrderedNode
+from ..search import OENode, TreeNode, EvaluatedConcept, HeuristicQueue, QualityOrderedNode, LengthOrderedNode
 
-from typing import Optional, Union, Iterable, Dict
+from typing import Optional, Union, Iterable, Dict, FrozenSet, Tuple, List
+from collections import Counter
+import numpy as np
 import owlapy
 
-from owlapy.class_expression import OWLClassExpression
+from owlapy.class_expression import OWLClassExpression, OWLObjectIntersectionOf
+from owlapy.owl_individual import OWLNamedIndividual
 from contextlib import contextmanager
-from sortedcontainers import SortedSet
 from owlapy.utils import OrderedOWLObject
-from owlapy.utils import EvaluatedDescriptionSet, ConceptOperandSorter, OperandSetTransform
+from owlapy.utils import EvaluatedDescriptionSet, ConceptOperandSorter, OperandSetTransform, LRUCache
 import time
+from functools import lru_cache
 from itertools import islice
 from owlapy.render import DLSyntaxObjectRenderer
 
 from ..utils.static_funcs import concept_len
 
 _concept_operand_sorter = ConceptOperandSorter()
+_operand_set_transform = OperandSetTransform()
+
+
+def _popcount(bits: np.ndarray) -> int:
+    if hasattr(np, 'bitwise_count'):  # numpy >= 2.0
+        return int(np.bitwise_count(bits).sum())
+    return int(np.unpackbits(bits.view(np.uint8)).sum())
+
+
+@lru_cache(maxsize=8192)
+def _sorted_operands(c: OWLClassExpression) -> OWLClassExpression:
+    # The same (sub-)expressions reappear across refinements and in the retrieval cache keys, sort them only once.
+    return _concept_operand_sorter.sort(c)
+
+
+@lru_cache(maxsize=8192)
+def _cached_concept_len(c: OWLClassExpression) -> int:
+    # Refinements share most of their sub-expressions, reuse their lengths instead of walking them again.
+    return concept_len(c)
 
 
 class CELOE(RefinementBasedConceptLearner):
@@ -54,7 +75,7 @@ class CELOE(RefinementBasedConceptLearner):
         best_only (bool): If False pick only nodes with quality < 1.0, else pick without quality restrictions.
         calculate_min_max (bool): Calculate minimum and maximum horizontal expansion? Statistical purpose only.
         heuristic_func (AbstractHeuristic): Function to guide the search heuristic.
-        heuristic_queue (SortedSet[OENode]): A sorted set that compares the nodes based on Heuristic.
+        heuristic_queue (HeuristicQueue[OENode]): A max-heap that orders the nodes based on Heuristic.
         iter_bound (int): Limit to stop the algorithm after n refinement steps are done.
         kb (AbstractKnowledgeBase): The knowledge base that the concept learner is using.
         max_child_length (int): Limit the length of concepts generated by the refinement operator.
@@ -75,7 +96,8 @@ class CELOE(RefinementBasedConceptLearner):
 
     """
     __slots__ = 'best_descriptions', 'max_he', 'min_he', 'best_only', 'calculate_min_max', 'heuristic_queue', \
-        'search_tree', '_learning_problem', '_max_runtime', '_seen_norm_concepts'
+        'search_tree', '_learning_problem', '_max_runtime', '_seen_norm_concepts', '_tree_nodes_by_id', \
+        '_individuals_cache', '_examples', '_pos_bits', '_neg_bits', '_bits_cache', '_he_counts', '_max_results'
 
     name = 'celoe_python'
 
@@ -124,9 +146,25 @@ class CELOE(RefinementBasedConceptLearner):
                          max_num_of_concepts_tested=max_num_of_concepts_tested,
                          max_runtime=max_runtime)
         self.search_tree: Dict[OWLClassExpression, TreeNode[OENode]] = dict()
-        self.heuristic_queue = SortedSet(key=HeuristicOrderedNode)
+        # Same TreeNodes keyed by id() of their OENode, so that the lookup of the node to refine does not need to
+        # hash the (nested) class expression. Nodes are kept alive by search_tree, hence their ids are stable.
+        self._tree_nodes_by_id: Dict[int, TreeNode[OENode]] = dict()
+        self.heuristic_queue = HeuristicQueue()
+        # Multiset of the horizontal expansions of the nodes in heuristic_queue, used to track min_he.
+        self._he_counts: Counter = Counter()
         self._seen_norm_concepts = set()
+        # Instances of already retrieved concepts keyed by their canonical form (NNF, sorted operands), so that
+        # equivalent refinements reached via different paths are retrieved only once.
+        self._individuals_cache: LRUCache[OWLClassExpression, FrozenSet[OWLNamedIndividual]] = \
+            LRUCache(maxsize=1024)
+        # Coverage of the examples of the current learning problem as bitsets (one bit per example, packed into
+        # uint64 words), keyed like _individuals_cache. Built lazily by _example_bits and dropped on clean().
+        self._examples: Optional[Tuple[OWLNamedIndividual, ...]] = None
+        self._pos_bits: Optional[np.ndarray] = None
+        self._neg_bits: Optional[np.ndarray] = None
+        self._bits_cache: Dict[OWLClassExpression, np.ndarray] = dict()
         self.best_descriptions = EvaluatedDescriptionSet(max_size=max_results, ordering=QualityOrderedNode)
+        self._max_results = max_results
 
         self.best_only = best_only
         self.calculate_min_max = calculate_min_max
@@ -140,14 +178,13 @@ class CELOE(RefinementBasedConceptLearner):
 
     def next_node_to_expand(self, step: int) -> OENode:  # pragma: no cover
         if not self.best_only:
-            for node in reversed(self.heuristic_queue):
-                if node.quality < 1.0:
-                    return node
-            else:
+            node = self.heuristic_queue.first(lambda n: n.quality < 1.0)
+            if node is None:
                 raise ValueError("No Node with lesser accuracy found")
+            return node
         else:
             # from reimplementation, pick without quality criterion
-            return self.heuristic_queue[-1]
+            return self.heuristic_queue.peek()
 
     def best_hypotheses(self, n: int = 1, return_node: bool = False) -> Union[
         OWLClassExpression | Iterable[OWLClassExpression],
@@ -165,12 +202,12 @@ class CELOE(RefinementBasedConceptLearner):
                 return [i.concept for i in x]
 
     def make_node(self, c: OWLClassExpression, parent_node: Optional[OENode] = None, is_root: bool = False) -> OENode:
-        return OENode(c, concept_len(c), parent_node=parent_node, is_root=is_root)
+        return OENode(c, _cached_concept_len(c), parent_node=parent_node, is_root=is_root)
     # TODO:CD: Why do we need this ?
     @contextmanager
     def updating_node(self, node: OENode):
         """
-        Removes the node from the heuristic sorted set and inserts it again.
+        Removes the node from the heuristic queue and inserts it again once its heuristic is updated.
 
         Args:
             Node to update.
@@ -178,20 +215,19 @@ class CELOE(RefinementBasedConceptLearner):
         Yields:
             The node itself.
         """
-        try:
-            self.heuristic_queue.discard(node)
-        except ValueError:
-            # TODO:CD: We need to understand this
-            pass
+        self.heuristic_queue.discard(node)
+        self._he_counts[node.h_exp] -= 1
         yield node
+        self._he_counts[node.h_exp] += 1
         self.heuristic_queue.add(node)
 
     def downward_refinement(self, node: OENode) -> Iterable[OENode]:
         with self.updating_node(node):
             downward_refinements = self.operator.refine(node.concept, max_length=node.h_exp,
                                                         current_domain=self.start_class)
-            sorted_downward_refinements = SortedSet((_concept_operand_sorter.sort(i) for i in downward_refinements),
-                                                    key=OrderedOWLObject)
+            # dedupe through a dict, then sort once
+            sorted_downward_refinements = sorted(dict.fromkeys(map(_sorted_operands, downward_refinements)),
+                                                 key=OrderedOWLObject)
             node.increment_h_exp()
             node.refinement_count = len(sorted_downward_refinements)
             self.heuristic_func.apply(node, None, self._learning_problem)
@@ -207,7 +243,7 @@ class CELOE(RefinementBasedConceptLearner):
         assert not self.search_tree, "search_tree cannot be None"
         self._learning_problem = learning_problem.encode_kb(self.kb)
         self._max_runtime = max_runtime if max_runtime is not None else self.max_runtime
-        root = self.make_node(_concept_operand_sorter.sort(self.start_class), is_root=True)
+        root = self.make_node(_sorted_operands(self.start_class), is_root=True)
         self._add_node(root, None)
         assert len(self.heuristic_queue) == 1, "The length of heuristic_queue must be equal to 1 after root init."
         self.start_time = time.time()
@@ -216,13 +252,11 @@ class CELOE(RefinementBasedConceptLearner):
             tree_parent = self.tree_node(most_promising)
             minimum_length = most_promising.h_exp
             # print("now refining %s", most_promising)
-            for ref in self.downward_refinement(most_promising):
-                # we ignore all refinements with lower length
-                # (this also avoids duplicate node children)
-                if ref.len < minimum_length:
-                    continue
-                # note: tree_parent has to be equal to node_tree_parent(ref.parent_node)!
-                added = self._add_node(ref, tree_parent)
+            # we ignore all refinements with lower length
+            # (this also avoids duplicate node children)
+            refs = [ref for ref in self.downward_refinement(most_promising) if ref.len >= minimum_length]
+            # note: tree_parent has to be equal to node_tree_parent(ref.parent_node)!
+            for ref, added in self._add_nodes_batch(refs, tree_parent):
                 goal_found = added and ref.quality == 1.0
                 if goal_found and self.terminate_on_goal:
                     return self.terminate()
@@ -250,9 +284,36 @@ class CELOE(RefinementBasedConceptLearner):
         Returns:
             TreeNode of the given node.
         """
-        return self.search_tree[node.concept]
+        return self._tree_nodes_by_id[id(node)]
+
+    def _add_nodes_batch(self, refs: List[OENode],
+                         tree_parent: Optional[TreeNode[OENode]]) -> Iterable[Tuple[OENode, bool]]:
+        """
+        Add the refinements of one node to the search tree.
 
-    def _add_node(self, ref: OENode, tree_parent: Optional[TreeNode[OENode]]):
+        The individuals of a refinement are retrieved only when it is added, so a goal found early in the wave does
+        not pay for the retrieval of the rest of it. Operands of an intersection which are refinements of the same
+        wave are retrieved first, so that the intersection is answered from the retrieval cache instead of the
+        knowledge base.
+
+        Args:
+            refs: The refinements.
+            tree_parent: The TreeNode of the refined node.
+
+        Yields:
+            Each new refinement together with whether it was added, in the given order.
+        """
+        wave = [(ref, _sorted_operands(ref.concept.get_nnf())) for ref in refs if ref.concept not in self.search_tree]
+        siblings = {key for _, key in wave}
+        for ref, key in wave:
+            if isinstance(key, OWLObjectIntersectionOf):
+                for op in key.operands():
+                    if op in siblings:
+                        self._individuals_set(op, op)
+            yield ref, self._add_node(ref, tree_parent, key)
+
+    def _add_node(self, ref: OENode, tree_parent: Optional[TreeNode[OENode]],
+                  key: Optional[OWLClassExpression] = None):
         # TODO:CD: Why have this constraint ?
         #  We should not ignore a concept due to this constraint.
         #  It might be the case that new path to ref.concept is a better path. Hence, we should update its parent
@@ -262,15 +323,26 @@ class CELOE(RefinementBasedConceptLearner):
             # ignoring refinement, it has been refined from another parent
             return False
 
-        norm_concept = OperandSetTransform().simplify(ref.concept)
-        if norm_concept in self._seen_norm_concepts:
-            norm_seen = True
+        # add() and compare sizes: the normalised concept is hashed once instead of twice.
+        num_seen = len(self._seen_norm_concepts)
+        self._seen_norm_concepts.add(_operand_set_transform.simplify(ref.concept))
+        norm_seen = len(self._seen_norm_concepts) == num_seen
+
+        self.search_tree[ref.concept] = self._tree_nodes_by_id[id(ref)] = TreeNode(ref, tree_parent,
+                                                                                   is_root=ref.is_root)
+        if key is None:
+            key = _sorted_operands(ref.concept.get_nnf())
+        inds = self._individuals_set(ref.concept, key)
+        if inds:
+            bits = self._example_bits(key, inds)
+            tp = _popcount(bits & self._pos_bits)
+            fp = _popcount(bits & self._neg_bits)
         else:
-            norm_seen = False
-            self._seen_norm_concepts.add(norm_concept)
-
-        self.search_tree[ref.concept] = TreeNode(ref, tree_parent, is_root=ref.is_root)
-        e = evaluate_concept(self.kb, ref.concept, self.quality_func, self._learning_problem)
+            # no example is covered, but the quality of an empty concept still depends on the metric (e.g. Accuracy)
+            tp = fp = 0
+        _, q = self.quality_func.score2(tp=tp, fn=len(self._learning_problem.kb_pos) - tp, fp=fp,
+                                        tn=len(self._learning_problem.kb_neg) - fp)
+        e = EvaluatedConcept(q, inds, len(inds))
 
         ref.quality = e.q
         self._number_of_tested_concepts += 1
@@ -279,23 +351,96 @@ class CELOE(RefinementBasedConceptLearner):
         assert 0 <= ref.quality <= 1.0
         # TODO: expression rewriting
         self.heuristic_func.apply(ref, e.inds, self._learning_problem)
-        if not norm_seen and self.best_descriptions.maybe_add(ref):
-            #if logger.isEnabledFor(logging.DEBUG):
-            # print("Better description found: %s", ref)
-            pass
+        # Once best_descriptions is full, a node of lower quality than its worst entry can not get in: skip the
+        # ordered insert attempt (ties are left to maybe_add, which also compares lengths).
+        if not norm_seen and (len(self.best_descriptions.items) < self._max_results
+                              or ref.quality >= self.best_descriptions.items[0].quality):
+            self.best_descriptions.maybe_add(ref)
         self.heuristic_queue.add(ref)
+        self._he_counts[ref.h_exp] += 1
         # TODO: implement noise
         return True
 
+    def _individuals_set(self, concept: OWLClassExpression,
+                         key: Optional[OWLClassExpression] = None) -> FrozenSet[OWLNamedIndividual]:
+        """
+        Get the individuals of a concept through the semantic retrieval cache.
+
+        Intersections whose operands are all cached are answered by intersecting the cached sets instead of
+        querying the knowledge base. Unions are always retrieved: an open-world reasoner may entail more instances
+        of A ⊔ B than those of A and of B together.
+
+        Args:
+            concept: The concept.
+            key: The canonical form of the concept (NNF, sorted operands), computed if not given.
+
+        Returns:
+            The individuals of the concept.
+        """
+        if key is None:
+            key = _sorted_operands(concept.get_nnf())
+        if key in self._individuals_cache:
+            return self._individuals_cache[key]
+
+        inds = None
+        if isinstance(key, OWLObjectIntersectionOf):
+            operands = list(key.operands())
+            if all(op in self._individuals_cache for op in operands):
+                inds = frozenset.intersection(*(self._individuals_cache[op] for op in operands))
+        if inds is None:
+            inds = self.kb.individuals_set(concept)
+        self._individuals_cache[key] = inds
+        return inds
+
+    def _example_bits(self, key: OWLClassExpression, inds: FrozenSet[OWLNamedIndividual]) -> np.ndarray:
+        """
+        Get the bitset of the examples covered by a concept.
+
+        Bit i is set iff the i-th example (positives first, then negatives) is an instance of the concept, so the
+        confusion matrix is obtained by AND-ing with the positive/negative masks and counting bits. Intersections
+        whose operands are all cached are answered by AND-ing the cached bitsets; any other concept, unions
+        included, is encoded from ``inds``.
+
+        Args:
+            key: The canonical form of the concept (NNF, sorted operands).
+            inds: The individuals of the concept.
+
+        Returns:
+            The bitset as an array of uint64 words.
+        """
+        if self._examples is None:
+            self._examples = tuple(self._learning_problem.kb_pos) + tuple(self._learning_problem.kb_neg)
+            num_pos = len(self._learning_problem.kb_pos)
+            self._pos_bits = self._pack_bits(np.arange(len(self._examples)) < num_pos)
+            self._neg_bits = self._pack_bits(np.arange(len(self._examples)) >= num_pos)
+
+        bits = self._bits_cache.get(key)
+        if bits is not None:
+            return bits
+        if isinstance(key, OWLObjectIntersectionOf):
+            operand_bits = [self._bits_cache.get(op) for op in key.operands()]
+            if all(b is not None for b in operand_bits):
+                bits = np.bitwise_and.reduce(operand_bits)
+        if bits is None:
+            bits = self._pack_bits(np.fromiter((i in inds for i in self._examples), dtype=bool,
+                                               count=len(self._examples)))
+        self._bits_cache[key] = bits
+        return bits
+
+    @staticmethod
+    def _pack_bits(mask: np.ndarray) -> np.ndarray:
+        words = np.packbits(mask, bitorder='little')
+        words = np.pad(words, (0, -len(words) % 8))
+        return words.view(np.uint64)
+
     def _add_node_evald(self, ref: OENode, eval_: EvaluatedConcept, tree_parent: Optional[TreeNode[OENode]]):  # pragma: no cover
-        norm_concept = OperandSetTransform().simplify(ref.concept)
-        if norm_concept in self._seen_norm_concepts:
-            norm_seen = True
-        else:
-            norm_seen = False
-            self._seen_norm_concepts.add(norm_concept)
+        # add() and compare sizes: the normalised concept is hashed once instead of twice.
+        num_seen = len(self._seen_norm_concepts)
+        self._seen_norm_concepts.add(_operand_set_transform.simplify(ref.concept))
+        norm_seen = len(self._seen_norm_concepts) == num_seen
 
-        self.search_tree[ref.concept] = TreeNode(ref, tree_parent, is_root=ref.is_root)
+        self.search_tree[ref.concept] = self._tree_nodes_by_id[id(ref)] = TreeNode(ref, tree_parent,
+                                                                                   is_root=ref.is_root)
 
         ref.quality = eval_.q
         self._number_of_tested_concepts += 1
@@ -307,6 +452,7 @@ class CELOE(RefinementBasedConceptLearner):
         if not norm_seen and self.best_descriptions.maybe_add(ref):
             print("Better description found: %s", ref)
         self.heuristic_queue.add(ref)
+        self._he_counts[ref.h_exp] += 1
         # TODO: implement noise
         return True
 
@@ -331,9 +477,11 @@ class CELOE(RefinementBasedConceptLearner):
         def tree_node_as_length_ordered_concept(tn: TreeNode[OENode]):
             return LengthOrderedNode(tn.node, tn.node.len)
 
+        heur_ranks = {id(n): rank for rank, n in enumerate(self.heuristic_queue.descending(), 1)}
+
         def print_partial_tree_recursive(tn: TreeNode[OENode], depth: int = 0):
             if tn.node.heuristic is not None:
-                heur_idx = len(self.heuristic_queue) - self.heuristic_queue.index(tn.node)
+                heur_idx = heur_ranks.get(id(tn.node))
             else:
                 heur_idx = None
 
@@ -371,32 +519,23 @@ class CELOE(RefinementBasedConceptLearner):
         print('######## Search Tree ###########\n')
 
     def update_min_max_horiz_exp(self, node: OENode):
-        he = node.h_exp
         # update maximum value
-        self.max_he = max(self.max_he, he)
-
-        if self.min_he == he - 1:
-            threshold_score = node.heuristic + 1 - node.quality
-
-            for n in reversed(self.heuristic_queue):
-                if n == node:
-                    continue
-                if n.h_exp == self.min_he:
-                    """ we can stop instantly when another node with min. """
-                    return
-                if n.heuristic < threshold_score:
-                    """ we can stop traversing nodes when their score is too low. """
-                    break
-            # inc. minimum since we found no other node which also has min. horiz. exp.
+        self.max_he = max(self.max_he, node.h_exp)
+        # inc. minimum as long as no node in the queue has min. horiz. exp.
+        while self.min_he < self.max_he and self._he_counts[self.min_he] == 0:
             self.min_he += 1
 
-            # print("minimum horizontal expansion is now %d", self.min_he)
-
     def clean(self):
         self.heuristic_queue.clear()
+        self._he_counts.clear()
         self.best_descriptions.clean()
         self.search_tree.clear()
+        self._tree_nodes_by_id.clear()
         self._seen_norm_concepts.clear()
+        self._examples = None
+        self._pos_bits = None
+        self._neg_bits = None
+        self._bits_cache.clear()
         self.max_he = 0
         self.min_he = 1
         self._learning_problem = None
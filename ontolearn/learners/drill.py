@@ -23,6 +23,7 @@
 # -----------------------------------------------------------------------------
 from abc import abstractmethod
 
+import numpy as np
 import pandas as pd
 import json
 from owlapy.class_expression import OWLClassExpression, OWLThing, OWLClass
@@ -34,14 +35,14 @@ from ontolearn.base_concept_learner import RefinementBasedConceptLearner
 from ontolearn.refinement_operators import LengthBasedRefinement
 from ontolearn.abstracts import AbstractNode, AbstractKnowledgeBase
 from ontolearn.search import RL_State
-from typing import Set, List, Tuple, Optional, Generator, SupportsFloat, Iterable, FrozenSet, Callable, Union
+from typing import Set, List, Tuple, Optional, Generator, SupportsFloat, Iterable, FrozenSet, Callable, Union, Dict
 from ontolearn.learning_problem import PosNegLPStandard
 import torch
 from ontolearn.data_struct import Experience
 from ontolearn.search import DRILLSearchTreePriorityQueue
 from ontolearn.utils import create_experiment_folder
-from collections import Counter, deque
-from itertools import chain
+from collections import Counter, OrderedDict, deque
+from itertools import chain, accumulate
 import time
 import os
 from ontolearn.utils import read_csv
@@ -49,13 +50,49 @@ from ontolearn.utils import read_csv
 from ontolearn.utils.static_funcs import compute_f1_score, compute_f1_score_from_confusion_matrix, concept_len
 import random
 from ontolearn.heuristics import CeloeBasedReward
-from ontolearn.data_struct import PrepareBatchOfPrediction
 from tqdm import tqdm
 from owlapy.converter import owl_expression_to_sparql_with_confusion_matrix
 
 from ontolearn.triple_store import TripleStore
 from ontolearn.utils.static_funcs import make_iterable_verbose
 from owlapy.utils import get_expression_length
+from functools import lru_cache
+
+# Number of sets of individuals whose mean embedding Drill keeps.
+_EMB_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=8192)
+def _cached_expression_length(c: OWLClassExpression) -> int:
+    # Refinements share most of their sub-expressions, reuse their lengths instead of walking them again.
+    return get_expression_length(c)
+
+
+def _read_embeddings(path_embeddings: str, path_embeddings_cache: str = None) -> pd.DataFrame:
+    """Read a csv file of embeddings, optionally through a binary copy of it.
+
+    Without a cache path, the csv file is parsed. With one, the float32 matrix is stored at that path together with
+    its row and column labels (same path, ".labels.json" suffix) on the first read. Later reads memory-map the
+    matrix, so rows are paged in on demand instead of parsing the csv and holding a second copy of the values. The
+    copy is rebuilt when the csv file is newer. Both reads give the same DataFrame.
+    """
+    if path_embeddings_cache is None:
+        return pd.read_csv(path_embeddings, index_col=0).astype('float32')
+    path_labels = os.path.splitext(path_embeddings_cache)[0] + ".labels.json"
+    if os.path.isfile(path_embeddings_cache) and os.path.isfile(path_labels) and \
+            min(os.path.getmtime(path_embeddings_cache), os.path.getmtime(path_labels)) >= \
+            os.path.getmtime(path_embeddings):
+        with open(path_labels) as f:
+            labels = json.load(f)
+        # Copy-on-write mapping: the values are never modified, but torch expects writable arrays.
+        matrix = np.load(path_embeddings_cache, mmap_mode="c")
+        return pd.DataFrame(matrix, index=labels["index"], columns=labels["columns"], copy=False)
+    df = pd.read_csv(path_embeddings, index_col=0).astype('float32')
+    with open(path_embeddings_cache, "wb") as f:
+        np.save(f, np.ascontiguousarray(df.values))
+    with open(path_labels, "w") as f:
+        json.dump({"index": df.index.tolist(), "columns": df.columns.tolist()}, f)
+    return df
 
 
 class Drill(RefinementBasedConceptLearner):  # pragma: no cover
@@ -85,7 +122,10 @@ class Drill(RefinementBasedConceptLearner):  # pragma: no cover
                  max_runtime=None,
                  num_of_sequential_actions=3,
                  stop_at_goal=True,
-                 num_episode: int = 10):
+                 num_episode: int = 10,
+                 check_nans: bool = False,
+                 half_precision_embeddings: bool = False,
+                 path_embeddings_cache: str = None):
 
         self.name = "DRILL"
         self.verbose = verbose
@@ -94,14 +134,31 @@ class Drill(RefinementBasedConceptLearner):  # pragma: no cover
         if path_embeddings and os.path.isfile(path_embeddings): #
             if self.verbose > 0:
                 print("Reading Embeddings...", end="\t")
-            self.df_embeddings = pd.read_csv(path_embeddings, index_col=0).astype('float32')
+            self.df_embeddings = _read_embeddings(path_embeddings, path_embeddings_cache)
             self.num_entities, self.embedding_dim = self.df_embeddings.shape
+            # Dense view of the embeddings and the row of each IRI: gathering rows by position is much cheaper than
+            # label-based .loc lookups, which are done for every RL state.
+            self._emb_matrix = np.ascontiguousarray(self.df_embeddings.values, dtype=np.float32)
+            self._iri2row = {iri: i for i, iri in enumerate(self.df_embeddings.index)}
+            # Shares the memory of the matrix; the batched gathers of state embeddings run on it. In half precision,
+            # it is a float16 copy that halves the memory read per gather, the gathered rows are averaged in float32.
+            self._emb_tensor = torch.from_numpy(self._emb_matrix.astype(np.float16) if half_precision_embeddings
+                                                else self._emb_matrix)
+            # Row of each individual seen so far, its IRI is cleaned and looked up only once.
+            self._ind2row: Dict[OWLNamedIndividual, int] = dict()
+            # Mean embedding of recently seen sets of individuals, many refinements share the same instances.
+            self._emb_cache: OrderedDict = OrderedDict()
             if self.verbose > 0:
                 print(self.df_embeddings.shape)
         else:
             if self.verbose > 0:
                 print("No pre-trained model...")
             self.df_embeddings = None
+            self._emb_matrix = None
+            self._iri2row = None
+            self._emb_tensor = None
+            self._ind2row = None
+            self._emb_cache = None
             self.num_entities, self.embedding_dim = None, 1
 
         # (2) Initialize Refinement operator.
@@ -135,9 +192,13 @@ class Drill(RefinementBasedConceptLearner):  # pragma: no cover
         self.num_episodes_per_replay = num_episodes_per_replay
         self.seen_examples = dict()
         self.emb_pos, self.emb_neg = None, None
+        self._emb_examples = None
+        self._pred_buf = None
         self.pos: FrozenSet[OWLNamedIndividual] = None
         self.neg: FrozenSet[OWLNamedIndividual] = None
         self.positive_type_bias = positive_type_bias
+        # Sanity checks of the example embeddings are only needed while debugging embeddings.
+        self.check_nans = check_nans
 
         self.start_time = None
         self.goal_found = False
@@ -189,8 +250,14 @@ class Drill(RefinementBasedConceptLearner):  # pragma: no cover
         self.pos = pos
         self.neg = neg
 
-        self.emb_pos = self.get_embeddings_individuals(individuals=[i.str for i in self.pos])
-        self.emb_neg = self.get_embeddings_individuals(individuals=[i.str for i in self.neg])
+        if self.df_embeddings is None:
+            # Without embeddings, init_embeddings_of_examples leaves them unset: use zero vectors instead.
+            self.emb_pos = self.get_embeddings_individuals(individuals=[i.str for i in self.pos])
+            self.emb_neg = self.get_embeddings_individuals(individuals=[i.str for i in self.neg])
+        # Shape: 1, 2, d. The example channels are the same for every input of the Q network during this learning
+        # problem, hence they are assembled once and only expanded (not copied) per batch.
+        self._emb_examples = torch.cat([self.emb_pos, self.emb_neg], dim=1)
+        self._pred_buf = None
 
         # (3) Initialize the root state of the quasi-ordered RL env.
         # print("Initializing Root RL state...", end=" ")
@@ -370,7 +437,7 @@ class Drill(RefinementBasedConceptLearner):  # pragma: no cover
                     continue
                 if self.verbose > 0:
                     tqdm_bar.set_description_str(
-                        f"Step {_} | Refining {owl_expression_to_dl(most_promising.concept)} | {owl_expression_to_dl(ref.concept)} | Quality:{ref.quality:.4f}")
+                        f"Step {_} | Refining {most_promising.dl_repr} | {ref.dl_repr} | Quality:{ref.quality:.4f}")
                 if ref.quality > best_found_quality:
                     if self.verbose > 0:
                         print("\nBest Found:", ref)
@@ -385,8 +452,9 @@ class Drill(RefinementBasedConceptLearner):  # pragma: no cover
                 continue
             # (6.4) Predict Q-values
             if self.df_embeddings is not None:
+                # Converted once to floats: the search tree then orders plain numbers instead of 0-dim tensors.
                 preds = self.predict_values(current_state=most_promising,
-                                            next_states=next_possible_states)
+                                            next_states=next_possible_states).tolist()
             else:
                 preds = None
             # (6.5) Add next possible states into search tree based on predicted Q values
@@ -404,33 +472,27 @@ class Drill(RefinementBasedConceptLearner):  # pragma: no cover
             self.pos = pos_uri
             self.neg = neg_uri
 
-            self.emb_pos = torch.from_numpy(self.df_embeddings.loc[
-                                                [owl_individual.str.strip() for owl_individual in
-                                                 pos_uri]].values)
-            # Shape: |E^+| x d
-            self.emb_neg = torch.from_numpy(self.df_embeddings.loc[
-                                                [owl_individual.str.strip() for owl_individual in
-                                                 neg_uri]].values)
+            emb_pos = self._emb_matrix[self._individual_rows(pos_uri)]
+            # Shape: |E^-| x d
+            emb_neg = self._emb_matrix[self._individual_rows(neg_uri)]
             """ (3) Take the mean of positive and negative examples and reshape it into (1,1,embedding_dim) for mini
-             batching """
-            # Shape: d
-            self.emb_pos = torch.mean(self.emb_pos, dim=0)
-            # Shape: d
-            self.emb_neg = torch.mean(self.emb_neg, dim=0)
+             batching. The mean is taken in numpy, only the resulting d-dimensional vector is wrapped (without a copy)
+             as a tensor. """
             # Shape: 1, 1, d
-            self.emb_pos = self.emb_pos.view(1, 1, self.emb_pos.shape[0])
-            self.emb_neg = self.emb_neg.view(1, 1, self.emb_neg.shape[0])
+            self.emb_pos = torch.from_numpy(emb_pos.mean(axis=0)).view(1, 1, emb_pos.shape[1])
+            self.emb_neg = torch.from_numpy(emb_neg.mean(axis=0)).view(1, 1, emb_neg.shape[1])
             # Sanity checking
-            if torch.isnan(self.emb_pos).any() or torch.isinf(self.emb_pos).any():
-                raise ValueError('invalid value detected in E+,\n{0}'.format(self.emb_pos))
-            if torch.isnan(self.emb_neg).any() or torch.isinf(self.emb_neg).any():
-                raise ValueError('invalid value detected in E-,\n{0}'.format(self.emb_neg))
+            if __debug__ and self.check_nans:
+                if not torch.isfinite(self.emb_pos).all():
+                    raise ValueError('invalid value detected in E+,\n{0}'.format(self.emb_pos))
+                if not torch.isfinite(self.emb_neg).all():
+                    raise ValueError('invalid value detected in E-,\n{0}'.format(self.emb_neg))
 
     def create_rl_state(self, c: OWLClassExpression, parent_node: Optional[RL_State] = None,
                         is_root: bool = False) -> RL_State:
         """ Create an RL_State instance."""
         rl_state = RL_State(c, parent_node=parent_node, is_root=is_root)
-        rl_state.length = get_expression_length(c)
+        rl_state.length = _cached_expression_length(c)
         return rl_state
 
     def compute_quality_of_class_expression(self, state: RL_State) -> None:
@@ -458,8 +520,7 @@ class Drill(RefinementBasedConceptLearner):  # pragma: no cover
             quality = self.quality_func(confusion_matrix=confusion_matrix)
 
         else:
-            individuals = frozenset([i for i in self.kb.individuals(state.concept)])
-            quality = self.quality_func(individuals=individuals, pos=self.pos, neg=self.neg)
+            quality = self.quality_func(individuals=self.state_individuals(state), pos=self.pos, neg=self.neg)
         state.quality = quality
         self._number_of_tested_concepts += 1
 
@@ -511,10 +572,11 @@ class Drill(RefinementBasedConceptLearner):  # pragma: no cover
         X - A list of embeddings of current concept, next concept, positive examples, negative examples.
         y - Argmax Q value.
         """
-        for th, consecutive_states in enumerate(state_pairs):
-            e, e_next = consecutive_states
-            self.experiences.append(
-                (e, e_next, max(rewards[th:])))  # given e, e_next, Q val is the max Q value reachable.
+        # suffix_max[th] = max(rewards[th:]) computed in a single right-to-left pass.
+        suffix_max = list(accumulate(reversed(rewards), max))[::-1]
+        for (e, e_next), q_val in zip(state_pairs, suffix_max):
+            # given e, e_next, Q val is the max Q value reachable.
+            self.experiences.append((e, e_next, q_val))
 
     def learn_from_replay_memory(self) -> None:
         """
@@ -525,58 +587,51 @@ class Drill(RefinementBasedConceptLearner):  # pragma: no cover
             return None
 
         # print('learn_from_replay_memory', end="\t|\t")
-        current_state_batch: List[torch.FloatTensor]
-        next_state_batch: List[torch.FloatTensor]
+        current_state_batch: torch.FloatTensor
+        next_state_batch: torch.FloatTensor
+        # N, 1, dim | N, 1, dim | N
         current_state_batch, next_state_batch, y = self.experiences.retrieve()
-        # N, 1, dim
-        current_state_batch = torch.cat(current_state_batch, dim=0)
-        # N, 1, dim
-        next_state_batch = torch.cat(next_state_batch, dim=0)
-        y = torch.Tensor(y)
 
-        try:
-            assert current_state_batch.shape[1] == next_state_batch.shape[1] == self.emb_pos.shape[1] == \
-                   self.emb_neg.shape[1]
-
-        except AssertionError as e:
-            print(current_state_batch.shape)
-            print(next_state_batch.shape)
-            print(self.emb_pos.shape)
-            print(self.emb_neg.shape)
-            print('Wrong format.')
-            print(e)
-            raise
-
-        assert current_state_batch.shape[2] == next_state_batch.shape[2] == self.emb_pos.shape[2] == self.emb_neg.shape[
-            2]
+        assert current_state_batch.shape[1:] == next_state_batch.shape[1:] == self.emb_pos.shape[1:] == \
+               self.emb_neg.shape[1:], (f"Wrong format: {current_state_batch.shape}, {next_state_batch.shape}, "
+                                        f"{self.emb_pos.shape}, {self.emb_neg.shape}")
 
         num_next_states = len(current_state_batch)
         # Ensure that X has the same data type as parameters of DRILL
         # batch, 4, dim
-        X = torch.cat([
-            current_state_batch,
-            next_state_batch,
-            self.emb_pos.repeat((num_next_states, 1, 1)),
-            self.emb_neg.repeat((num_next_states, 1, 1))], 1)
+        X = torch.empty((num_next_states, 4, current_state_batch.shape[2]), dtype=current_state_batch.dtype)
+        X[:, 0:1] = current_state_batch
+        X[:, 1:2] = next_state_batch
+        X[:, 2:4] = self._emb_examples
 
         self.heuristic_func.net.train()
         total_loss = 0
         if self.verbose > 0:
             print(f"Experience replay Experiences ({X.shape})", end=" | ")
+        # Mini-batches are plain slices of a shuffled index, no DataLoader (and no worker processes) is involved.
+        # Without a batch size, or when all experiences fit into one batch, each epoch is a single full-batch step.
+        batch_size = self.batch_size if self.batch_size else num_next_states
         for m in range(self.num_epochs_per_replay):
-            self.optimizer.zero_grad()  # zero the gradient buffers
-            # forward: n by 4, dim
-            predicted_q = self.heuristic_func.net.forward(X)
-            # loss
-            loss = self.heuristic_func.net.loss(predicted_q, y)
-            if self.verbose > 0:
-                print(f"{m} Replay loss: {loss.item():.5f}", end=" | ")
-            total_loss += loss.item()
-            # compute the derivative of the loss w.r.t. the parameters using backpropagation
-            loss.backward()
-            # clip gradients if gradients are killed. =>torch.nn.utils.clip_grad_norm_(self.model.parameters(), 0.5)
-            self.optimizer.step()
-        print(f'Avg loss: {total_loss / self.num_epochs_per_replay:0.5f}')
+            if batch_size < num_next_states:
+                batches = torch.randperm(num_next_states).split(batch_size)
+            else:
+                batches = [None]
+            for idx in batches:
+                X_batch, y_batch = (X, y) if idx is None else (X[idx], y[idx])
+                self.optimizer.zero_grad()  # zero the gradient buffers
+                # forward: n by 4, dim
+                predicted_q = self.heuristic_func.net.forward(X_batch)
+                # loss
+                loss = self.heuristic_func.net.loss(predicted_q, y_batch)
+                if self.verbose > 0:
+                    print(f"{m} Replay loss: {loss.item():.5f}", end=" | ")
+                total_loss += loss.item() / len(batches)
+                # compute the derivative of the loss w.r.t. the parameters using backpropagation
+                loss.backward()
+                # clip gradients if gradients are killed. =>torch.nn.utils.clip_grad_norm_(self.model.parameters(), 0.5)
+                self.optimizer.step()
+        if self.verbose > 0:
+            print(f'Avg loss: {total_loss / self.num_epochs_per_replay:0.5f}')
         self.heuristic_func.net.eval()
 
     def update_search(self, concepts, predicted_Q_values=None):
@@ -607,23 +662,91 @@ class Drill(RefinementBasedConceptLearner):  # pragma: no cover
         else:
             if self.df_embeddings is not None:
                 assert isinstance(individuals[0], str)
-                emb = torch.mean(torch.from_numpy(self.df_embeddings.loc[individuals].values, ), dim=0)
+                emb = torch.from_numpy(self._emb_matrix[self._embedding_rows(individuals)].mean(axis=0))
                 emb = emb.view(1, 1, self.embedding_dim)
             else:
                 emb = torch.zeros(1, 1, self.embedding_dim)
         return emb
 
+    def get_embeddings_of_states(self, states: List[RL_State]) -> torch.FloatTensor:
+        """
+        Mean embeddings of the individuals of each state, gathered from the embedding matrix at once.
+
+        States that already carry embeddings are not retrieved again, and states whose set of individuals was
+        seen recently reuse its cached embedding. Only the remaining ones are gathered.
+
+        Returns:
+            Tensor of shape (len(states), 1, embedding_dim). States without individuals are mapped to zeros.
+        """
+        emb = torch.zeros((len(states), self.embedding_dim))
+        missing = []
+        for i, state in enumerate(states):
+            if state.embeddings is None:
+                missing.append(i)
+            else:
+                emb[i] = state.embeddings.reshape(-1)
+        if self._emb_tensor is None:
+            return emb.view(len(states), 1, self.embedding_dim)
+        individuals, uncached = [], []
+        for i in missing:
+            key = self.state_individuals(states[i])
+            cached = self._emb_cache.get(key)
+            if cached is not None:
+                self._emb_cache.move_to_end(key)
+                emb[i] = cached
+            else:
+                individuals.append(key)
+                uncached.append(i)
+        if uncached:
+            counts = torch.tensor([len(inds) for inds in individuals], dtype=torch.long)
+            rows = torch.from_numpy(self._individual_rows(chain.from_iterable(individuals)))
+            # Sum the gathered rows into the position of their state, then divide by the number of individuals.
+            # States without individuals receive no rows and stay zero.
+            index = torch.tensor(uncached, dtype=torch.long)
+            emb.index_add_(0, torch.repeat_interleave(index, counts), self._emb_tensor.index_select(0, rows).float())
+            emb[index] /= counts.clamp(min=1).unsqueeze(1)
+            for key, i in zip(individuals, uncached):
+                self._emb_cache[key] = emb[i].clone()
+            while len(self._emb_cache) > _EMB_CACHE_SIZE:
+                self._emb_cache.popitem(last=False)
+        return emb.view(len(states), 1, self.embedding_dim)
+
+    def _embedding_rows(self, individuals: Iterable[str]) -> np.ndarray:
+        """Get the rows of the given IRIs in the embedding matrix. Raises KeyError for unknown IRIs."""
+        return np.fromiter((self._iri2row[i] for i in individuals), dtype=np.int64)
+
+    def _individual_rows(self, individuals: Iterable[OWLNamedIndividual]) -> np.ndarray:
+        """Get the rows of the given individuals in the embedding matrix. Raises KeyError for unknown IRIs."""
+        ind2row = self._ind2row
+
+        def row(ind: OWLNamedIndividual) -> int:
+            r = ind2row.get(ind)
+            if r is None:
+                r = ind2row[ind] = self._iri2row[ind.str.strip()]
+            return r
+
+        return np.fromiter(map(row, individuals), dtype=np.int64)
+
+    def state_individuals(self, rl_state: RL_State) -> FrozenSet[OWLNamedIndividual]:
+        """Individuals of the concept of a rl state, retrieved once per state."""
+        if rl_state.instances is None:
+            rl_state.instances = frozenset(self.kb.individuals(rl_state.concept))
+        return rl_state.instances
+
     def get_individuals(self, rl_state: RL_State) -> List[str]:
         return [owl_individual.str.strip() for owl_individual in self.kb.individuals(rl_state.concept)]
 
     def assign_embeddings(self, rl_state: RL_State) -> None:
         """
         Assign embeddings to a rl state. A rl state is represented with vector representation of
-        all individuals belonging to a respective OWLClassExpression.
+        all individuals belonging to a respective OWLClassExpression. States that already carry embeddings, e.g.
+        from a batched prediction, are left untouched.
         """
         assert isinstance(rl_state, RL_State)
         assert isinstance(rl_state.concept, OWLClassExpression)
-        rl_state.embeddings = self.get_embeddings_individuals(self.get_individuals(rl_state))
+        if rl_state.embeddings is not None:
+            return
+        rl_state.embeddings = self.get_embeddings_of_states([rl_state])
 
     def save_weights(self, path: str = None) -> None:
         """ Save weights DQL"""
@@ -668,7 +791,7 @@ class Drill(RefinementBasedConceptLearner):  # pragma: no cover
         """
         # predictions: torch.Size([len(next_states)])
         predictions: torch.FloatTensor = self.predict_values(current_state, next_states)
-        argmax_id = int(torch.argmax(predictions))
+        argmax_id = predictions.argmax().item()
         next_state = next_states[argmax_id]
         return next_state
 
@@ -681,20 +804,43 @@ class Drill(RefinementBasedConceptLearner):  # pragma: no cover
         """
 
         assert len(next_states) > 0
-        with torch.no_grad():
-            self.heuristic_func.net.eval()
+        # The network is in eval mode outside of learn_from_replay_memory, it does not need to be set per call.
+        with torch.inference_mode():
             # create batch batch.
-            next_state_batch = []
-            for _ in next_states:
-                next_state_batch.append(self.get_embeddings_individuals(self.get_individuals(_)))
-            next_state_batch = torch.cat(next_state_batch, dim=0)
-            x = PrepareBatchOfPrediction(self.get_embeddings_individuals(self.get_individuals(current_state)),
-                                         next_state_batch,
-                                         self.emb_pos,
-                                         self.emb_neg).get_all()
+            next_state_batch = self.get_embeddings_of_states(next_states)
+            # Keep the gathered embeddings on the states, the selected one needs them again afterwards.
+            for i, state in enumerate(next_states):
+                state.embeddings = next_state_batch[i:i + 1]
+            if current_state.embeddings is None:
+                self.assign_embeddings(current_state)
+            x = self._prediction_input(current_state.embeddings, next_state_batch)
             predictions = self.heuristic_func.net.forward(x)
         return predictions
 
+    def _prediction_input(self, current_state: torch.Tensor, next_state_batch: torch.Tensor) -> torch.Tensor:
+        """
+        Write the input of the Q network into a buffer that is reused across predictions of a learning problem.
+
+        The buffer only grows when a larger batch of next states shows up. The example channels are constant during a
+        learning problem, so they are written once when the buffer is allocated.
+
+        Args:
+            current_state: Embeddings of the current state, shape (1, 1, d).
+            next_state_batch: Embeddings of the next states, shape (n, 1, d).
+
+        Returns:
+            A (n, 4, d) view of the buffer.
+        """
+        n = len(next_state_batch)
+        if self._pred_buf is None or len(self._pred_buf) < n:
+            size = n if self._pred_buf is None else max(n, 2 * len(self._pred_buf))
+            self._pred_buf = torch.empty((size, 4, next_state_batch.shape[2]), dtype=next_state_batch.dtype)
+            self._pred_buf[:, 2:4] = self._emb_examples
+        x = self._pred_buf[:n]
+        x[:, 0:1] = current_state
+        x[:, 1:2] = next_state_batch
+        return x
+
     @staticmethod
     def retrieve_concept_chain(rl_state: RL_State) -> List[RL_State]:
         hierarchy = deque()
@@ -812,6 +958,8 @@ class Drill(RefinementBasedConceptLearner):  # pragma: no cover
 
     def clean(self):
         self.emb_pos, self.emb_neg = None, None
+        self._emb_examples = None
+        self._pred_buf = None
         self.pos = None
         self.neg = None
         self.goal_found = False
@@ -858,12 +1006,20 @@ class DrillHeuristic:  # pragma: no cover
         if model:
             self.net = model
         elif mode in ['averaging', 'sampling']:
-            self.net = DrillNet(model_args)
+            # Scripted once here: the conv/linear/relu chain then runs as a single graph per forward call.
+            self.net = torch.jit.script(DrillNet(model_args))
             self.mode = mode
             self.name = 'DrillHeuristic_' + self.mode
         else:
             raise ValueError
         self.net.eval()
+        if model_args is not None and not model:
+            # The profiling executor of TorchScript specializes the graph on the shapes seen in its first calls.
+            # Two batch sizes leave the batch dimension dynamic while the channels and the embedding dimension, which
+            # are fixed for a model, stay specialized. This warm-up is done here rather than in the first fit.
+            with torch.no_grad():
+                for batch_size in (1, 2):
+                    self.net(torch.zeros((batch_size, *model_args['input_shape'])))
 
     def score(self, node, parent_node=None):
         """ Compute heuristic value of root node only"""
@@ -40,7 +40,7 @@ class OCEL(CELOE):
         best_only (bool): If False pick only nodes with quality < 1.0, else pick without quality restrictions.
         calculate_min_max (bool): Calculate minimum and maximum horizontal expansion? Statistical purpose only.
         heuristic_func (AbstractHeuristic): Function to guide the search heuristic.
-        heuristic_queue (SortedSet[OENode]): A sorted set that compares the nodes based on Heuristic.
+        heuristic_queue (HeuristicQueue[OENode]): A max-heap that orders the nodes based on Heuristic.
         iter_bound (int): Limit to stop the algorithm after n refinement steps are done.
         kb (AbstractKnowledgeBase): The knowledge base that the concept learner is using.
         max_child_length (int): Limit the length of concepts generated by the refinement operator.
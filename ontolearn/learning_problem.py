@@ -25,7 +25,8 @@
 """Learning problem in Ontolearn."""
 import logging
 import random
-from typing import Set, Optional
+from functools import lru_cache
+from typing import Set, Optional, FrozenSet, Tuple
 from owlapy.render import DLSyntaxObjectRenderer
 from ontolearn.abstracts import AbstractLearningProblem, EncodedLearningProblem, EncodedPosNegLPStandardKind, \
     AbstractKnowledgeBase
@@ -34,6 +35,17 @@ from owlapy.owl_individual import OWLNamedIndividual
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
+def _as_tuple(population: FrozenSet) -> Tuple:
+    """Get the elements of a set as a tuple to sample from.
+
+    The tuple is kept for the next call with the same set, e.g. the set of all individuals that a knowledge base keeps,
+    so that it is not copied again for every learning problem. Its order is that of ``list(population)``, hence
+    sampling from it draws the same elements for the same seed.
+    """
+    return tuple(population)
+
+
 class EncodedPosNegLPStandard(EncodedPosNegLPStandardKind):
     """Encoded learning problem standard.
 
@@ -113,10 +125,9 @@ class PosNegLPStandard(AbstractLearningProblem):
         Return:
             EncodedPosNegLPStandard: The encoded learning problem.
         """
-        if self.all is None:
-            kb_all = set(kb.individuals())
-        else:
-            kb_all = set(kb.individuals_set(self.all))
+        # frozenset() does not copy a frozenset, e.g. the all individuals set a KnowledgeBase keeps.
+        # The examples are frozensets already (see __init__), they are used as they are.
+        kb_all = frozenset(kb.individuals()) if self.all is None else self.all
 
         assert 0 < len(self.pos) < len(kb_all) and len(kb_all) > len(self.neg)
         if logger.isEnabledFor(logging.INFO):
@@ -124,28 +135,18 @@ class PosNegLPStandard(AbstractLearningProblem):
             logger.info('E^+:[ {0} ]'.format(', '.join(map(r.render, self.pos))))
             logger.info('E^-:[ {0} ]'.format(', '.join(map(r.render, self.neg))))
 
-        kb_pos = kb.individuals_set(self.pos)
+        kb_pos = self.pos
         if len(self.neg) == 0:  # if negatives are not provided, randomly sample.
-            kb_neg = type(kb_all)(random.sample(list(kb_all), len(kb_pos)))
+            kb_neg = type(kb_all)(random.sample(_as_tuple(kb_all), len(kb_pos)))
         else:
-            kb_neg = kb.individuals_set(self.neg)
-
-        try:
-            assert len(kb_pos) == len(self.pos)
-        except AssertionError:
-            print(self.pos)
-            print(kb_pos)
-            print(kb_all)
-            print('Assertion error. Exiting.')
-            raise
-        if self.neg:
-            assert len(kb_neg) == len(self.neg)
+            kb_neg = self.neg
 
         return EncodedPosNegLPStandard(
             kb_pos=kb_pos,
             kb_neg=kb_neg,
             kb_all=kb_all,
-            kb_diff=kb_all.difference(kb_pos.union(kb_neg)))
+            # Removing both example sets in one call spares building their union first.
+            kb_diff=kb_all.difference(kb_pos, kb_neg))
 
 class EncodedPosNegUndLP(EncodedLearningProblem):
     """To be implemented."""
@@ -23,7 +23,10 @@
 # -----------------------------------------------------------------------------
 
 """NCES architectures."""
-from ontolearn.nces_modules import *
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from ontolearn.nces_modules import ISAB, PMA
 
 
 class LSTM(nn.Module):
@@ -165,22 +165,24 @@ class NCESTrainer:
                 triples_batch = next(triples_dataloader)
             except:
                 triples_dataloader = iter(DataLoader(TriplesDataset(er_vocab=self.er_vocab, num_e=len(self.synthesizer.triples_data.entities)),
-                                                    batch_size=2*self.batch_size, num_workers=self.num_workers, shuffle=True))
+                                                    batch_size=2*self.batch_size, num_workers=self.num_workers, shuffle=True,
+                                                    pin_memory=device.type == "cuda"))
                 triples_batch = next(triples_dataloader)
         
         x_pos, x_neg, labels = batch
         target_sequence = self.map_to_token(labels)
         if device.type == "cuda":
-            x_pos, x_neg, labels = x_pos.cuda(), x_neg.cuda(), labels.cuda()
+            # Batches come from pinned memory, the copies overlap with the work queued on the GPU.
+            x_pos, x_neg, labels = x_pos.cuda(non_blocking=True), x_neg.cuda(non_blocking=True), labels.cuda(non_blocking=True)
         pred_sequence, scores = model(x_pos, x_neg)
         loss = model.loss(scores, labels)
         # Forward triples to embedding model
         if emb_model is not None:
             e1_idx, r_idx, emb_targets = triples_batch
             if device.type == "cuda":
-                emb_targets = emb_targets.cuda()
-                r_idx = r_idx.cuda()
-                e1_idx = e1_idx.cuda()
+                emb_targets = emb_targets.cuda(non_blocking=True)
+                r_idx = r_idx.cuda(non_blocking=True)
+                e1_idx = e1_idx.cuda(non_blocking=True)
             loss_ = emb_model.forward_head_and_loss(e1_idx, r_idx, emb_targets)
             loss = loss + loss_
         s_acc, h_acc = self.compute_accuracy(pred_sequence, target_sequence)
@@ -226,15 +228,16 @@ class NCESTrainer:
                 train_dataset = ROCESDataset(data, self.synthesizer.triples_data, k=self.synthesizer.k if hasattr(self.synthesizer, 'k') else None, vocab=self.synthesizer.vocab, inv_vocab=self.synthesizer.inv_vocab,
                                          max_length=self.synthesizer.max_length, num_examples=self.synthesizer.num_examples, sampling_strategy=self.synthesizer.sampling_strategy)
                 train_dataset.load_embeddings(model["emb_model"]) # Load embeddings the first time
-                train_dataloader = DataLoader(train_dataset, batch_size=self.batch_size, num_workers=self.num_workers, collate_fn=self.collate_batch, shuffle=True)
+                train_dataloader = DataLoader(train_dataset, batch_size=self.batch_size, num_workers=self.num_workers, collate_fn=self.collate_batch, shuffle=True, pin_memory=device.type == "cuda")
                 # Get dataloader for the embedding model
                 self.er_vocab = self.get_er_vocab()
                 triples_dataloader = iter(DataLoader(TriplesDataset(er_vocab=self.er_vocab, num_e=len(self.synthesizer.triples_data.entities)),
-                                          batch_size=2*self.batch_size, num_workers=self.num_workers, shuffle=True))
+                                          batch_size=2*self.batch_size, num_workers=self.num_workers, shuffle=True,
+                                          pin_memory=device.type == "cuda"))
             else:
                 assert hasattr(self.synthesizer, "instance_embeddings"), "If no embedding model is available, `instance_embeddings` must be an attribute of the synthesizer since you are probably training NCES"
                 train_dataloader = DataLoader(NCESDataset(data, embeddings=self.synthesizer.instance_embeddings, num_examples=self.synthesizer.num_examples, vocab=self.synthesizer.vocab, inv_vocab=self.synthesizer.inv_vocab, shuffle_examples=shuffle_examples, max_length=self.synthesizer.max_length, example_sizes=example_sizes),
-                                                       batch_size=self.batch_size, num_workers=self.num_workers, collate_fn=self.collate_batch, shuffle=True)
+                                                       batch_size=self.batch_size, num_workers=self.num_workers, collate_fn=self.collate_batch, shuffle=True, pin_memory=device.type == "cuda")
             Train_loss = []
             Train_acc = defaultdict(list)
             best_score = 0
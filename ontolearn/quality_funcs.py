@@ -34,10 +34,9 @@ def f1(*, individuals: Set, pos: Set, neg: Set):
     assert isinstance(neg, set)
 
     tp = len(pos.intersection(individuals))
-    tn = len(neg.difference(individuals))
-
     fp = len(neg.intersection(individuals))
-    fn = len(pos.difference(individuals))
+    fn = len(pos) - tp
+    tn = len(neg) - fp
 
     try:
         recall = tp / (tp + fn)
@@ -62,10 +61,9 @@ def acc(*, individuals: Set, pos: Set, neg: Set):
     assert isinstance(neg, set)
 
     tp = len(pos.intersection(individuals))
-    tn = len(neg.difference(individuals))
-
     fp = len(neg.intersection(individuals))
-    fn = len(pos.difference(individuals))
+    fn = len(pos) - tp
+    tn = len(neg) - fp
     return (tp + tn) / (tp + tn + fp + fn)
 
 
@@ -85,8 +83,6 @@ def evaluate_concept(kb: AbstractKnowledgeBase, concept: OWLClassExpression, qua
         The evaluated concept.
     """
 
-    e = EvaluatedConcept()
-    e.inds = kb.individuals_set(concept)
-    e.ic = len(e.inds)
-    _, e.q = quality_func.score_elp(e.inds, encoded_learning_problem)
-    return e
+    inds = kb.individuals_set(concept)
+    _, q = quality_func.score_elp(inds, encoded_learning_problem)
+    return EvaluatedConcept(q, inds, len(inds))
@@ -26,7 +26,7 @@
 from collections import defaultdict
 from itertools import chain
 import random
-from typing import DefaultDict, Dict, Set, Optional, Iterable, List, Type, Final, Generator
+from typing import DefaultDict, Dict, Set, Optional, Iterable, List, Type, Final, Generator, FrozenSet, Tuple
 
 from owlapy.class_expression import OWLObjectSomeValuesFrom, OWLObjectAllValuesFrom, OWLObjectIntersectionOf, \
     OWLClassExpression, OWLNothing, OWLThing, OWLNaryBooleanClassExpression, OWLObjectUnionOf, OWLClass, \
@@ -308,7 +308,7 @@ class ModifiedCELOERefinement(BaseRefinement[OENode]):
     """
     __slots__ = 'max_child_length', 'use_negation', 'use_all_constructor', 'use_inverse', 'use_card_restrictions', \
         'max_nr_fillers', 'card_limit', 'use_numeric_datatypes', 'use_boolean_datatype', 'dp_splits', \
-        'value_splitter', 'use_time_datatypes', 'generator'
+        'value_splitter', 'use_time_datatypes', 'generator', 'existential_pruning_table'
 
     _Node: Final = OENode
 
@@ -326,6 +326,7 @@ class ModifiedCELOERefinement(BaseRefinement[OENode]):
     max_nr_fillers: DefaultDict[OWLObjectPropertyExpression, int]
     dp_splits: Dict[OWLDataPropertyExpression, List[OWLLiteral]]
     generator: ConceptGenerator
+    existential_pruning_table: Optional[FrozenSet[Tuple[OWLObjectPropertyExpression, OWLClass]]]
 
     def __init__(self,
                  knowledge_base: AbstractKnowledgeBase,
@@ -350,6 +351,7 @@ class ModifiedCELOERefinement(BaseRefinement[OENode]):
         self.use_boolean_datatype = use_boolean_datatype
         self.card_limit = card_limit
         self.generator = ConceptGenerator()
+        self.existential_pruning_table = None
         super().__init__(knowledge_base)
         self._setup()
 
@@ -380,6 +382,32 @@ class ModifiedCELOERefinement(BaseRefinement[OENode]):
         if len(split_dps) > 0:
             self.dp_splits = self.value_splitter.compute_splits_properties(self.kb.reasoner, split_dps)
 
+    def build_pruning_table(self):
+        """Precompute the (property, named class) pairs r, C for which ∃ r.C has instances.
+
+        For every object property, the class hierarchy is traversed top-down and a class is only expanded if
+        its existential restriction has instances, since the restrictions over its sub classes are then empty too.
+        Once built, named fillers of existential restrictions that are not in the table are not generated anymore.
+        """
+        obj_properties = list(self.kb.get_object_properties())
+        if self.use_inverse:
+            obj_properties.extend(list(map(OWLObjectInverseOf, obj_properties)))
+
+        table = set()
+        for prop in obj_properties:
+            stack = list(self.kb.most_general_classes())
+            visited = set(stack)
+            while stack:
+                c = stack.pop()
+                if self.kb.individuals_count(self.generator.existential_restriction(c, prop)) == 0:
+                    continue
+                table.add((prop, c))
+                for sub in self.kb.get_direct_sub_concepts(c):
+                    if sub not in visited:
+                        visited.add(sub)
+                        stack.append(sub)
+        self.existential_pruning_table = frozenset(table)
+
     def _operands_len(self, _Type: Type[OWLNaryBooleanClassExpression],
                       ops: List[OWLClassExpression]) -> int:
         """Calculate the length of a OWL Union or Intersection with operands ops.
@@ -553,8 +581,13 @@ class ModifiedCELOERefinement(BaseRefinement[OENode]):
 
         # rule 1: EXISTS r.D = > EXISTS r.E
         domain = self._get_current_domain(ce.get_property())
+        table = self.existential_pruning_table
         for i in self.refine(ce.get_filler(), max_length=max_length - 2, current_domain=domain):
             if i is not None:
+                if table is not None and isinstance(i, OWLClass) and not i.is_owl_thing() \
+                        and (ce.get_property(), i) not in table:
+                    # EXISTS r.E has no instances
+                    continue
                 yield self.generator.existential_restriction(i, ce.get_property())
 
         for more_special_op in self.kb.object_property_hierarchy. \
@@ -23,14 +23,18 @@
 # -----------------------------------------------------------------------------
 
 """Node representation."""
-import weakref
-from _weakref import ReferenceType
+import heapq
+import math
 from abc import abstractmethod, ABCMeta
-from functools import total_ordering
-from queue import PriorityQueue
-from typing import List, Optional, ClassVar, Final, Iterable, TypeVar, Generic, Set, Tuple, Dict
+from dataclasses import dataclass, field
+from functools import total_ordering, lru_cache
+from itertools import count
+from operator import attrgetter
+import numpy as np
+from typing import List, Optional, ClassVar, Final, Iterable, TypeVar, Generic, Tuple, Dict, Callable, FrozenSet
 from owlapy.owl_object import OWLObjectRenderer
 from owlapy.class_expression import OWLClassExpression
+from owlapy.owl_individual import OWLNamedIndividual
 from owlapy.render import DLSyntaxObjectRenderer
 from owlapy.utils import as_index, OrderedOWLObject
 from .abstracts import AbstractNode, AbstractHeuristic, AbstractScorer, AbstractOEHeuristicNode, LBLSearchTree, \
@@ -40,6 +44,13 @@ from owlapy import owl_expression_to_dl
 _N = TypeVar('_N')  #:
 
 
+@lru_cache(maxsize=100_000)
+def _render_dl(concept: OWLClassExpression) -> str:
+    # refinements share sub-concepts, so the same expressions are rendered over and over during search. The cache is
+    # keyed on the (immutable, hashable) expression itself and not on id(), which may be reused once a concept is freed
+    return owl_expression_to_dl(concept)
+
+
 # Due to a bug in Python, we cannot use the slots like we should be able to. Hence, the attribute access is also
 # invalid but there is nothing we can do. See https://mail.python.org/pipermail/python-list/2002-December/126637.html
 
@@ -51,10 +62,12 @@ class _NodeConcept(metaclass=ABCMeta):
     renderer: ClassVar[OWLObjectRenderer] = DLSyntaxObjectRenderer()
 
     _concept: OWLClassExpression
+    _concept_str: Optional[str]
 
     @abstractmethod
     def __init__(self, concept: OWLClassExpression):
         self._concept = concept
+        self._concept_str = None
 
     @property
     def concept(self) -> OWLClassExpression:
@@ -62,7 +75,10 @@ class _NodeConcept(metaclass=ABCMeta):
 
     @abstractmethod
     def __str__(self):
-        return _NodeConcept.renderer.render(self.concept)
+        # the concept of a node does not change, it is rendered on the first use only
+        if self._concept_str is None:
+            self._concept_str = _NodeConcept.renderer.render(self.concept)
+        return self._concept_str
 
     @property
     def str(self):
@@ -140,14 +156,18 @@ class _NodeHeuristic(metaclass=ABCMeta):
 class _NodeParentRef(Generic[_N], metaclass=ABCMeta):
     __slots__ = ()
 
-    _parent_ref: Optional[ReferenceType]  # Optional[ReferenceType[OENode]]
+    # Plain reference to the parent: the search trees keep all their nodes alive anyway, and drop them on clean().
+    _parent_ref: Optional[_N]
+    _depth: int
 
     @abstractmethod
     def __init__(self, parent_node: Optional[_N] = None, is_root: bool = False):
         if is_root:
             self._parent_ref = None
+            self._depth = 0
         else:
-            self._parent_ref = weakref.ref(parent_node)
+            self._parent_ref = parent_node
+            self._depth = parent_node._depth + 1
 
     @property
     def is_root(self) -> bool:
@@ -155,19 +175,11 @@ class _NodeParentRef(Generic[_N], metaclass=ABCMeta):
 
     @property
     def parent_node(self) -> Optional[_N]:
-        if self._parent_ref is None:
-            return None
-        return self._parent_ref()
+        return self._parent_ref
 
     def depth(self) -> int:
-        d = 0
-        n = self
-        while True:
-            n = n.parent_node
-            if not n:
-                break
-            d += 1
-        return d
+        """Number of ancestors of the node, counted when the node is created."""
+        return self._depth
 
     @abstractmethod
     def __str__(self):
@@ -203,7 +215,7 @@ class _NodeQuality(metaclass=ABCMeta):
 class Node(_NodeConcept, _NodeLen, _NodeIndividualsCount, AbstractNode):
     """ Simple node.
     """
-    __slots__ = '_concept', '_len', '_individuals_count'
+    __slots__ = '_concept', '_concept_str', '_len', '_individuals_count'
 
     def __init__(self, concept: OWLClassExpression, length: int):  # pragma: no cover
         _NodeConcept.__init__(self, concept)
@@ -222,9 +234,9 @@ class Node(_NodeConcept, _NodeLen, _NodeIndividualsCount, AbstractNode):
 class OENode(_NodeConcept, _NodeLen, _NodeIndividualsCount, _NodeQuality, _NodeHeuristic,
              _NodeParentRef['OENode'], AbstractNode, AbstractConceptNode, AbstractOEHeuristicNode):
     """OENode search tree node."""
-    __slots__ = '_concept', '_len', '_individuals_count', '_quality', '_heuristic', \
-        '_parent_ref', '_horizontal_expansion', \
-        '_refinement_count', '__weakref__'
+    __slots__ = '_concept', '_concept_str', '_len', '_individuals_count', '_quality', '_heuristic', \
+        '_parent_ref', '_depth', '_horizontal_expansion', \
+        '_refinement_count'
 
     renderer: ClassVar[OWLObjectRenderer] = DLSyntaxObjectRenderer()
 
@@ -273,81 +285,73 @@ class OENode(_NodeConcept, _NodeLen, _NodeIndividualsCount, _NodeQuality, _NodeH
         ))
 
 
-class EvoLearnerNode(_NodeConcept, _NodeLen, _NodeIndividualsCount, _NodeQuality, AbstractNode, AbstractConceptNode):
+@dataclass(frozen=True, slots=True, eq=False, repr=False)
+class EvoLearnerNode(AbstractNode, AbstractConceptNode):
     """
     EvoLearner search tree node.
     """
-    __slots__ = '_concept', '_len', '_individuals_count', '_quality', '_tree_length', '_tree_depth'
-
-    _tree_length: int
-    _tree_depth: int
-
-    def __init__(self,
-                 concept: OWLClassExpression,
-                 length: int,
-                 individuals_count: int,
-                 quality: float,
-                 tree_length: int,
-                 tree_depth: int):
-        _NodeConcept.__init__(self, concept)
-        _NodeLen.__init__(self, length)
-        _NodeIndividualsCount.__init__(self, individuals_count)
-        _NodeQuality.__init__(self, quality)
-        AbstractNode.__init__(self)
-        self._tree_length = tree_length
-        self._tree_depth = tree_depth
+    # field() keeps the abstract concept property of AbstractConceptNode from being taken as the default value
+    concept: OWLClassExpression = field()
+    length: int
+    individuals_count: int
+    quality: float
+    tree_length: int
+    tree_depth: int
 
     @property
-    def tree_length(self):
-        return self._tree_length
+    def len(self) -> int:
+        return self.length
 
     @property
-    def tree_depth(self):
-        return self._tree_depth
+    def str(self):
+        return _render_dl(self.concept)
 
     def __str__(self):
         return "\t".join((
             AbstractNode.__str__(self),
-            _NodeConcept.__str__(self),
-            _NodeQuality.__str__(self),
-            f'Length:{self._len}',
-            f'Tree Length:{self._tree_length}',
-            f'Tree Depth:{self._tree_depth}',
-            _NodeIndividualsCount.__str__(self),
+            self.str,
+            f'Quality:{self.quality}',
+            f'Length:{self.length}',
+            f'Tree Length:{self.tree_length}',
+            f'Tree Depth:{self.tree_depth}',
+            f'|Indv.|:{self.individuals_count}',
         ))
 
 
-class NCESNode(_NodeConcept, _NodeLen, _NodeIndividualsCount, _NodeQuality, AbstractNode, AbstractConceptNode):
+@dataclass(frozen=True, slots=True, eq=False, repr=False)
+class NCESNode(AbstractNode, AbstractConceptNode):
     """
     EvoLearner search tree node.
     """
-    __slots__ = '_concept', '_len', '_individuals_count', '_quality'
+    # field() keeps the abstract concept property of AbstractConceptNode from being taken as the default value
+    concept: OWLClassExpression = field()
+    length: int
+    individuals_count: int
+    quality: float
 
-    def __init__(self,
-                 concept: OWLClassExpression,
-                 length: int,
-                 individuals_count: int,
-                 quality: float):
-        _NodeConcept.__init__(self, concept)
-        _NodeLen.__init__(self, length)
-        _NodeIndividualsCount.__init__(self, individuals_count)
-        _NodeQuality.__init__(self, quality)
-        AbstractNode.__init__(self)
+    @property
+    def len(self) -> int:
+        return self.length
+
+    @property
+    def str(self):
+        return _render_dl(self.concept)
 
     def __str__(self):
         return "\t".join((
             AbstractNode.__str__(self),
-            _NodeConcept.__str__(self),
-            _NodeQuality.__str__(self),
-            f'Length:{self._len}',
-            _NodeIndividualsCount.__str__(self),
+            self.str,
+            f'Quality:{self.quality}',
+            f'Length:{self.length}',
+            f'|Indv.|:{self.individuals_count}',
         ))
 
 
 class RL_State(_NodeConcept, _NodeQuality, _NodeHeuristic, AbstractNode, _NodeParentRef['RL_State']):
     renderer: ClassVar[OWLObjectRenderer] = DLSyntaxObjectRenderer()
     """RL_State node."""
-    __slots__ = '_concept', 'embeddings', '_quality', '_heuristic', 'length', 'parent_node', 'is_root', '_parent_ref', '__weakref__'
+    __slots__ = '_concept', '_concept_str', 'embeddings', 'instances', '_quality', '_heuristic', 'length', 'parent_node', 'is_root', \
+        '_parent_ref', '_depth', '_dl_repr', '_dl_repr_nnf'
 
     def __init__(self, concept: OWLClassExpression, parent_node: Optional['RL_State'] = None,
                  embeddings=None, is_root: bool = False, length=None):
@@ -360,8 +364,26 @@ class RL_State(_NodeConcept, _NodeQuality, _NodeHeuristic, AbstractNode, _NodePa
         self.is_root = is_root
         self.length = length
         self.embeddings = embeddings
+        # Retrieved individuals of the concept, shared by the embedding and the quality computation of the state.
+        self.instances = None
+        self._dl_repr = None
+        self._dl_repr_nnf = None
         self.__sanity_checking()
 
+    @property
+    def dl_repr(self) -> str:
+        """DL syntax rendering of the concept, rendered once per state."""
+        if self._dl_repr is None:
+            self._dl_repr = _render_dl(self.concept)
+        return self._dl_repr
+
+    @property
+    def dl_repr_nnf(self) -> str:
+        """DL syntax rendering of the negation normal form of the concept, rendered once per state."""
+        if self._dl_repr_nnf is None:
+            self._dl_repr_nnf = _render_dl(self.concept.get_nnf())
+        return self._dl_repr_nnf
+
     def __sanity_checking(self):
         assert self.concept
         if self.is_root is False:
@@ -396,14 +418,15 @@ class RL_State(_NodeConcept, _NodeQuality, _NodeHeuristic, AbstractNode, _NodePa
 class _NodeIndividuals(metaclass=ABCMeta):
     __slots__ = ()
 
-    _individuals: Optional[set]
+    _individuals: Optional[FrozenSet[OWLNamedIndividual]]
 
     @abstractmethod
-    def __init__(self, individuals: Optional[set] = None):
-        self._individuals = individuals
+    def __init__(self, individuals: Optional[Iterable[OWLNamedIndividual]] = None):
+        # frozenset() does not copy a frozenset, e.g. the ones a KnowledgeBase hands out
+        self._individuals = None if individuals is None else frozenset(individuals)
 
     @property
-    def individuals(self):
+    def individuals(self) -> Optional[FrozenSet[OWLNamedIndividual]]:
         return self._individuals
 
     @property
@@ -411,18 +434,37 @@ class _NodeIndividuals(metaclass=ABCMeta):
         return len(self._individuals)
 
 
+class _ConceptKey:
+    """Dictionary key for a concept that hashes the concept only once.
+
+    Equality still compares the concepts, which is only needed when the hashes are equal."""
+    __slots__ = 'concept', '_hash'
+
+    def __init__(self, concept: OWLClassExpression):
+        self.concept = concept
+        self._hash = hash(concept)
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        return self._hash == other._hash and self.concept == other.concept
+
+
 class LBLNode(_NodeIndividuals, OENode):
     """ LBL search tree node."""
-    __slots__ = '_children', '_individuals'
+    __slots__ = '_children', '_individuals', 'concept_key'
 
     def __init__(self, concept: OWLClassExpression, length: int, individuals, parent_node: Optional['LBLNode'] = None,
                  is_root: bool = False):
         OENode.__init__(self, concept=concept, length=length, parent_node=parent_node, is_root=is_root)
         _NodeIndividuals.__init__(self, individuals)
-        self._children = set()
+        # children are unique by construction, a list spares hashing the nodes on every insertion
+        self._children = []
+        self.concept_key = _ConceptKey(concept)
 
     def add_child(self, n):
-        self._children.add(n)
+        self._children.append(n)
 
     def remove_child(self, n):
         self._children.remove(n)
@@ -437,7 +479,13 @@ class LBLNode(_NodeIndividuals, OENode):
 
     @parent_node.setter
     def parent_node(self, parent_node: Optional['LBLNode']):
-        self._parent_ref = weakref.ref(parent_node)
+        self._parent_ref = parent_node
+        self._set_depth(parent_node._depth + 1)
+
+    def _set_depth(self, depth: int):
+        self._depth = depth
+        for c in self._children:
+            c._set_depth(depth + 1)
 
 
 @total_ordering
@@ -468,31 +516,128 @@ class LengthOrderedNode(Generic[_N]):
 
 @total_ordering
 class HeuristicOrderedNode(Generic[_N]):
-    """A comparator that orders the Nodes based on Heuristic, then OrderedOWLObject of the concept"""
-    __slots__ = 'node'
+    """A comparator that orders the Nodes based on Heuristic, then OrderedOWLObject of the concept.
+
+    The sort key is computed once on creation, hence the wrapper has to be created after the heuristic of the node is
+    calculated (and again whenever it changes)."""
+    __slots__ = 'node', '_key'
 
     node: Final[_N]
 
     def __init__(self, node: _N):
         self.node = node
+        if node.heuristic is None:
+            self._key = None
+        else:
+            self._key = (node.heuristic, OrderedOWLObject(as_index(node.concept)))
 
     def __lt__(self: _N, other: _N):
-        if self.node.heuristic is None:
+        if self._key is None:
             raise ValueError("node heuristic not calculated", self.node)
-        if other.node.heuristic is None:
+        if other._key is None:
             raise ValueError("other node heuristic not calculcated", other.node)
-
-        if self.node.heuristic < other.node.heuristic:
-            return True
-        elif self.node.heuristic > other.node.heuristic:
-            return False
-        else:
-            return OrderedOWLObject(as_index(self.node.concept)) < OrderedOWLObject(as_index(other.node.concept))
+        return self._key < other._key
 
     def __eq__(self: _N, other: _N):
         return self.node == other.node
 
 
+class _ReversedOrder:
+    """Wraps an orderable object and inverts its order, so that a min-heap yields the greatest element first."""
+    __slots__ = 'o'
+
+    def __init__(self, o):
+        self.o = o
+
+    def __lt__(self, other):
+        return other.o < self.o
+
+    def __eq__(self, other):
+        return self.o == other.o
+
+
+class HeuristicQueue(Generic[_N]):
+    """A max-heap of nodes ordered like HeuristicOrderedNode, i.e. by heuristic, then OrderedOWLObject of the concept.
+
+    Inserting a node costs O(log n) and peeking the best node O(1) amortised. Removal is lazy: the entry of a
+    discarded node stays in the heap and is dropped once it reaches the top. The heuristic of a node is snapshot
+    when it is added, hence a node must be discarded before its heuristic changes and added again afterwards.
+    """
+    __slots__ = '_heap', '_live', '_counter'
+
+    def __init__(self):
+        self._heap: List[Tuple[float, _ReversedOrder, int, _N]] = []
+        # id(node) -> sequence number of the live heap entry of that node
+        self._live: Dict[int, int] = dict()
+        self._counter = count()
+
+    def add(self, node: _N):
+        if node.heuristic is None:
+            raise ValueError("node heuristic not calculated", node)
+        seq = next(self._counter)
+        self._live[id(node)] = seq
+        heapq.heappush(self._heap, (-node.heuristic, _ReversedOrder(OrderedOWLObject(as_index(node.concept))),
+                                    seq, node))
+
+    def discard(self, node: _N):
+        self._live.pop(id(node), None)
+
+    def _is_live(self, entry) -> bool:
+        return self._live.get(id(entry[3])) == entry[2]
+
+    def _drop_stale(self):
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+
+    def peek(self) -> _N:
+        """Get the node with the highest heuristic without removing it.
+
+        Raises:
+            IndexError: If the queue is empty.
+        """
+        self._drop_stale()
+        return self._heap[0][3]
+
+    def first(self, predicate: Callable[[_N], bool]) -> Optional[_N]:
+        """Get the node with the highest heuristic that satisfies the predicate, or None.
+
+        Nodes that do not satisfy the predicate stay in the queue.
+        """
+        skipped = []
+        found = None
+        while True:
+            self._drop_stale()
+            if not self._heap:
+                break
+            entry = self._heap[0]
+            if predicate(entry[3]):
+                found = entry[3]
+                break
+            skipped.append(heapq.heappop(self._heap))
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+        return found
+
+    def __iter__(self) -> Iterable[_N]:
+        """Iterate over the nodes in no particular order."""
+        return (entry[3] for entry in self._heap if self._is_live(entry))
+
+    def descending(self) -> List[_N]:
+        """Get the nodes sorted by decreasing heuristic."""
+        return [entry[3] for entry in sorted(self._heap) if self._is_live(entry)]
+
+    def __len__(self):
+        return len(self._live)
+
+    def __contains__(self, node: _N):
+        return id(node) in self._live
+
+    def clear(self):
+        self._heap.clear()
+        self._live.clear()
+        self._counter = count()
+
+
 @total_ordering
 class QualityOrderedNode:
     """QualityOrderedNode search tree node."""
@@ -525,11 +670,19 @@ class QualityOrderedNode:
         return self.node == other.node
 
 
+# get_top_n sort keys of the search tree nodes, by name
+_TOP_N_KEYS = {'quality': attrgetter('quality'), 'heuristic': attrgetter('heuristic'), 'length': attrgetter('len')}
+_DRILL_TOP_N_KEYS = {'quality': attrgetter('quality'), 'heuristic': attrgetter('heuristic'),
+                     'length': attrgetter('length')}
+
+
 def _node_and_all_children(n: _N) -> Iterable[_N]:  # pragma: no cover
     """Get a node and all of its children (recursively) in an iterable"""
-    yield n
-    for c in n.children:
-        yield from _node_and_all_children(c)
+    stack = [n]
+    while stack:
+        n = stack.pop()
+        yield n
+        stack.extend(n.children)
 
 
 class SearchTreePriorityQueue(LBLSearchTree[LBLNode]):
@@ -544,8 +697,12 @@ class SearchTreePriorityQueue(LBLSearchTree[LBLNode]):
     Attributes:
         quality_func: An instance of a subclass of AbstractScorer that measures the quality of a node.
         heuristic_func: An instance of a subclass of AbstractScorer that measures the promise of a node.
-        items_in_queue: An instance of PriorityQueue Class.
-        .nodes: A dictionary where keys are string representation of nodes and values are corresponding node objects.
+        items_in_queue: Buckets of queue entries by floor(heuristic * BUCKETS_PER_UNIT). Each bucket is a heap (list
+            ordered by heapq) of (-heuristic, OrderedOWLObject of the concept, sequence number, node) entries, i.e.
+            the order of HeuristicOrderedNode as plain tuples. Only the highest bucket is popped from, so a push or a
+            pop only sorts among nodes of almost equal heuristic. An entry is stale once its node is added again or
+            popped, and stale entries are skipped on pop.
+        .nodes: A dictionary where keys are the concept keys of nodes and values are corresponding node objects.
         nodes: A property method for ._nodes.
         expressionTests: not being used .
         str_to_obj_instance_mapping: not being used.
@@ -553,14 +710,32 @@ class SearchTreePriorityQueue(LBLSearchTree[LBLNode]):
 
     quality_func: AbstractScorer
     heuristic_func: AbstractHeuristic
-    nodes: Dict[OWLClassExpression, LBLNode]
-    items_in_queue: 'PriorityQueue[Tuple[float, HeuristicOrderedNode[LBLNode]]]'
+    nodes: Dict[_ConceptKey, LBLNode]
+    items_in_queue: Dict[int, List[Tuple[float, OrderedOWLObject, int, LBLNode]]]
+
+    BUCKETS_PER_UNIT: ClassVar[int] = 1024
 
     def __init__(self, quality_func, heuristic_func):  # pragma: no cover
         self.quality_func = quality_func
         self.heuristic_func = heuristic_func
         self.nodes = dict()
-        self.items_in_queue = PriorityQueue()
+        self.items_in_queue = dict()
+        # highest bucket of items_in_queue, None when there is no bucket
+        self._max_bucket: Optional[int] = None
+        # id(node) -> sequence number of the live queue entry of that node
+        self._live: Dict[int, int] = dict()
+        self._counter = count()
+
+    def _push(self, node: LBLNode):
+        seq = next(self._counter)
+        self._live[id(node)] = seq
+        b = math.floor(node.heuristic * self.BUCKETS_PER_UNIT)
+        bucket = self.items_in_queue.get(b)
+        if bucket is None:
+            bucket = self.items_in_queue[b] = []
+            if self._max_bucket is None or b > self._max_bucket:
+                self._max_bucket = b
+        heapq.heappush(bucket, (-node.heuristic, OrderedOWLObject(as_index(node.concept)), seq, node))
 
     def add(self, n: LBLNode):
         """
@@ -572,16 +747,16 @@ class SearchTreePriorityQueue(LBLSearchTree[LBLNode]):
         Returns:
             None
         """
-        self.items_in_queue.put((-n.heuristic, HeuristicOrderedNode(n)))  # gets the smallest one.
-        self.nodes[n.concept] = n
+        self._push(n)
+        self.nodes[n.concept_key] = n
 
     def add_root(self, node, kb_learning_problem):  # pragma: no cover
         assert node.is_root
         assert not self.nodes
         self.quality_func.apply(node, node.individuals, kb_learning_problem)
         self.heuristic_func.apply(node, node.individuals, kb_learning_problem)
-        self.items_in_queue.put((-node.heuristic, HeuristicOrderedNode(node)))  # gets the smallest one.
-        self.nodes[node.concept] = node
+        self._push(node)
+        self.nodes[node.concept_key] = node
 
     def add_node(self, *, node: LBLNode, parent_node: LBLNode, kb_learning_problem: EncodedLearningProblem) \
             -> Optional[bool]:  # pragma: no cover
@@ -601,46 +776,50 @@ class SearchTreePriorityQueue(LBLSearchTree[LBLNode]):
         Notes:
             node is a refinement of refined_node
         """
-        if node.concept in self.nodes and node.parent_node != parent_node:
+        if node.concept_key in self.nodes:
+            if node.parent_node == parent_node:
+                return None  # nothing changes, the node is neither scored nor queued again
             old_heuristic = node.heuristic
+            node.heuristic = None  # the heuristic can only be set when unset
             self.heuristic_func.apply(node, node.individuals, kb_learning_problem)
             new_heuristic = node.heuristic
             if new_heuristic > old_heuristic:
                 node.parent_node.remove_child(node)
                 node.parent_node = parent_node
                 parent_node.add_child(node)
-                self.items_in_queue.put((-node.heuristic, HeuristicOrderedNode(node)))  # gets the smallest one.
-                self.nodes[node.concept] = node
+                self._push(node)  # the entry with the old heuristic becomes stale
+                self.nodes[node.concept_key] = node
         else:
             # @todos reconsider it.
             self.quality_func.apply(node, node.individuals, kb_learning_problem)
             if node.quality == 0:
                 return False
             self.heuristic_func.apply(node, node.individuals, kb_learning_problem)
-            self.items_in_queue.put((-node.heuristic, HeuristicOrderedNode(node)))  # gets the smallest one.
-            self.nodes[node.concept] = node
-            parent_node.add_child(node)
+            self._push(node)
+            self.nodes[node.concept_key] = node
+            if node not in parent_node.children:  # nodes made by OCEL.make_node are linked to their parent already
+                parent_node.add_child(node)
             if node.quality == 1:
                 return True
 
     def get_most_promising(self) -> LBLNode:  # pragma: no cover
         """
-        Gets the current most promising node from Queue.
+        Gets the current most promising node from Queue. The node leaves the queue until it is added again.
 
         Returns:
             node: A node object
         """
-        _, most_promising_str = self.items_in_queue.get()  # get
-        try:
-            node = self.nodes[most_promising_str.node.concept]
-            self.items_in_queue.put((-node.heuristic, HeuristicOrderedNode(node)))  # put again into queue.
-            return node
-        except KeyError:
-            print(most_promising_str, 'is not found')
-            print('####')
-            for k, v in self.nodes.items():
-                print(k)
-            raise
+        while True:
+            if self._max_bucket is None:
+                raise IndexError("get_most_promising from an empty search tree")
+            bucket = self.items_in_queue[self._max_bucket]
+            _, __, seq, node = heapq.heappop(bucket)
+            if not bucket:
+                del self.items_in_queue[self._max_bucket]
+                self._max_bucket = max(self.items_in_queue, default=None)
+            if self._live.get(id(node)) == seq:
+                del self._live[id(node)]
+                return node
 
     def get_top_n(self, n: int, key='quality') -> List[LBLNode]:  # pragma: no cover
         """
@@ -649,41 +828,44 @@ class SearchTreePriorityQueue(LBLSearchTree[LBLNode]):
         Returns:
             top_n_predictions: A list of node objects
         """
-
-        if key == 'quality':
-            top_n_predictions = sorted(self.nodes.values(), key=lambda node: node.quality, reverse=True)[:n]
-        elif key == 'heuristic':
-            top_n_predictions = sorted(self.nodes.values(), key=lambda node: node.heuristic, reverse=True)[:n]
-        elif key == 'length':
-            top_n_predictions = sorted(self.nodes.values(), key=lambda node: node.len, reverse=True)[:n]
-        else:
+        try:
+            sort_key = _TOP_N_KEYS[key]
+        except KeyError:
             print('Wrong Key:{0}\tProgram exist.'.format(key))
-            raise KeyError
-        return top_n_predictions
+            raise
+        if key == 'quality':
+            # by decreasing quality, then shorter first like QualityOrderedNode, sorted by numpy on the key arrays
+            nodes = list(self.nodes.values())
+            qualities = np.fromiter((node.quality for node in nodes), dtype=np.float64, count=len(nodes))
+            lengths = np.fromiter((node.len for node in nodes), dtype=np.int64, count=len(nodes))
+            return [nodes[i] for i in np.lexsort((lengths, -qualities))[:n]]
+        return heapq.nlargest(n, self.nodes.values(), key=sort_key)
 
     def clean(self):
-        self.items_in_queue = PriorityQueue()
+        self.items_in_queue.clear()
+        self._max_bucket = None
+        self._live.clear()
+        self._counter = count()
         self.nodes.clear()
 
     def show_search_tree(self, root_concept: OWLClassExpression, heading_step: str):  # pragma: no cover
-        rdr = DLSyntaxObjectRenderer()
-
         print('######## ', heading_step, 'step Search Tree ###########')
 
         def node_as_length_ordered_concept(node: LBLNode):
             return LengthOrderedNode(node, node.len)
 
-        def print_partial_tree_recursive(node: LBLNode, depth: int = 0):
-            render_str = rdr.render(node.concept)
+        # depth-first, children in length order: they are pushed in reverse so that the shortest is popped first
+        stack = [(self.nodes[_ConceptKey(root_concept)], 0)]
+        while stack:
+            node, depth = stack.pop()
+            render_str = _render_dl(node.concept)
 
             depths = "`" * depth
 
             print("%s %s \t Q:%f Heur:%s" % (depths, render_str, node.quality, node.heuristic))
 
-            for c in sorted(node.children, key=node_as_length_ordered_concept):
-                print_partial_tree_recursive(c, depth + 1)
-
-        print_partial_tree_recursive(self.nodes[root_concept])
+            stack.extend((c, depth + 1) for c in sorted(node.children, key=node_as_length_ordered_concept,
+                                                        reverse=True))
 
 
 _TN = TypeVar('_TN', bound='TreeNode')  #:
@@ -694,14 +876,14 @@ class TreeNode(Generic[_N]):
     __slots__ = 'children', 'node'
 
     node: Final[_N]
-    children: Set['TreeNode[_N]']
+    children: List['TreeNode[_N]']
 
     def __init__(self: _TN, node: _N, parent_tree_node: Optional[_TN] = None, is_root: bool = False):
         self.node = node
-        self.children = set()
+        self.children = []
         if not is_root:
             assert isinstance(parent_tree_node, TreeNode)
-            parent_tree_node.children.add(self)
+            parent_tree_node.children.append(self)
 
 
 class DRILLSearchTreePriorityQueue(DRILLAbstractTree):
@@ -720,7 +902,7 @@ class DRILLSearchTreePriorityQueue(DRILLAbstractTree):
     ----------
     quality_func : An instance of a subclass of AbstractScorer that measures the quality of a node.
     heuristic_func : An instance of a subclass of AbstractScorer that measures the promise of a node.
-    items_in_queue: An instance of PriorityQueue Class.
+    items_in_queue: A heap (list ordered by heapq) of (-heuristic, length, DL representation) triples.
     .nodes: A dictionary where keys are string representation of nodes and values are corresponding node objects.
     nodes: A property method for ._nodes.
     expressionTests: not being used .
@@ -730,7 +912,7 @@ class DRILLSearchTreePriorityQueue(DRILLAbstractTree):
     def __init__(self, verbose):
         super().__init__()
         self.verbose = verbose
-        self.items_in_queue = PriorityQueue()
+        self.items_in_queue = []
 
     def add(self, node: RL_State):
         """
@@ -744,26 +926,26 @@ class DRILLSearchTreePriorityQueue(DRILLAbstractTree):
         """
         assert node.quality > 0, f"{RL_State.concept} cannot be added into the search tree"
         assert node.heuristic is not None
-        dl_representation = owl_expression_to_dl(node.concept.get_nnf())
+        dl_representation = node.dl_repr_nnf
         if dl_representation in self.nodes:
             """Do nothing"""
         else:
-            self.items_in_queue.put(
-                (-node.heuristic, len(owl_expression_to_dl(node.concept)), dl_representation))  # gets the smallest one.
+            heapq.heappush(self.items_in_queue,
+                           (-node.heuristic, len(node.dl_repr), dl_representation))
             self.nodes[dl_representation] = node
 
     def show_current_search_tree(self, top_n=10):
         """ Show search tree."""
         predictions = sorted(
             [(neg_heuristic, length, self.nodes[dl_representation]) for neg_heuristic, length, dl_representation in
-             self.items_in_queue.queue])[:top_n]
+             self.items_in_queue])[:top_n]
         if self.verbose>0:
             print(
-                f"\n######## Most Promising {top_n} Concepts out of {len(self.items_in_queue.queue)} Concepts ###########\n")
+                f"\n######## Most Promising {top_n} Concepts out of {len(self.items_in_queue)} Concepts ###########\n")
         for ith, (_, __, node) in enumerate(predictions):
             if self.verbose:
                 print(
-                    f"{ith + 1}-\t{owl_expression_to_dl(node.concept)} | Quality:{node.quality:.3f}| Heuristic:{node.heuristic:.3f}")
+                    f"{ith + 1}-\t{node.dl_repr} | Quality:{node.quality:.3f}| Heuristic:{node.heuristic:.3f}")
         # print('\n######## Current Search Tree ###########\n')
         if self.verbose:
             print('\n')
@@ -778,11 +960,11 @@ class DRILLSearchTreePriorityQueue(DRILLAbstractTree):
         -------
         node: A node object
         """
-        assert len(self.items_in_queue.queue) > 0 ,("Search tree is empty. "
+        assert len(self.items_in_queue) > 0 ,("Search tree is empty. "
                                                     "\nEnsure that there is at least one "
                                                     "owl:Class or"
                                                     "owl:ObjectProperty definitions")
-        _, __, dl_representation = self.items_in_queue.get(timeout=1.0)
+        _, __, dl_representation = heapq.heappop(self.items_in_queue)
         # R
         node = self.nodes[dl_representation]
         return node
@@ -795,22 +977,15 @@ class DRILLSearchTreePriorityQueue(DRILLAbstractTree):
         -------
         top_n_predictions: A list of node objects
         """
-        all_nodes = self.refined_nodes + self.nodes.values()
-        all_nodes.union(self.nodes)
-
-        if key == 'quality':
-            top_n_predictions = sorted(all_nodes, key=lambda node: node.quality, reverse=True)[:n]
-        elif key == 'heuristic':
-            top_n_predictions = sorted(all_nodes, key=lambda node: node.heuristic, reverse=True)[:n]
-        elif key == 'length':
-            top_n_predictions = sorted(self.nodes.values(), key=lambda node: len(node), reverse=True)[:n]
-        else:
+        try:
+            sort_key = _DRILL_TOP_N_KEYS[key]
+        except KeyError:
             print('Wrong Key:{0}\tProgram exist.'.format(key))
-            raise KeyError
-        return top_n_predictions
+            raise
+        return heapq.nlargest(n, self.nodes.values(), key=sort_key)
 
     def clean(self):
-        self.items_in_queue = PriorityQueue()
+        self.items_in_queue.clear()
         self._nodes.clear()
 
 
@@ -820,9 +995,18 @@ class EvaluatedConcept:
 
     This way, Python uses a more efficient way to store the instance attributes, which can significantly reduce the
     memory usage.
+
+    Args:
+        q: Quality of the concept.
+        inds: Individuals of the concept.
+        ic: Number of individuals of the concept.
     """
     __slots__ = 'q', 'inds', 'ic'
-    pass
+
+    def __init__(self, q: float, inds: FrozenSet[OWLNamedIndividual], ic: int):
+        self.q = q
+        self.inds = inds
+        self.ic = ic
 
 
 class SuperProp:  # pragma: no cover
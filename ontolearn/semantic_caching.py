@@ -46,6 +46,7 @@ from owlapy import owl_expression_to_dl
 from itertools import chain
 import os
 import random
+from pathlib import Path
 import itertools
 from owlready2 import *
 from collections import OrderedDict
@@ -160,6 +161,11 @@ def concept_generator(path_kg):
 
 
 
+def get_data_name(path_kg: str) -> str:
+    """Name of the dataset, i.e. the file name of the KG without its extension(s)."""
+    return Path(path_kg).name.split(".")[0]
+
+
 def get_saved_concepts(path_kg, data_name, shuffle):
     """Shuffle or not the generated concept and save it in a folder for reproducibility."""
     
@@ -232,11 +238,10 @@ class CacheWithEviction:
         """
         Retrieve an item from the cache. Updates access time for LRU/MRU.
         """
-        if key in self.cache:
-            if self.strategy in ['LRU', 'MRU']:
-                self.access_times[key] = time.time()  # Update access timestamp
-            return self.cache[key]
-        return None
+        value = self.cache.get(key)
+        if value is not None and self.strategy in ['LRU', 'MRU']:
+            self.access_times[key] = time.time()  # Update access timestamp
+        return value
 
     def put(self, key, value):
         """
@@ -543,36 +548,6 @@ def subsumption_caching_size(func, cache_size: int, eviction_strategy: str, rand
     time_initialization = 0
     loaded_reasoners: Dict[str, SyncReasoner] = {}
 
-    def precompute_class_instances(path_onto: str, onto) -> Dict[str, Set[str]]:
-        """
-        Precomputes all instances for each concept in the ontology using the reasoner.
-        Stores results in a dictionary for fast lookup.
-        """
-        reasoner = SyncReasoner(path_onto, reasoner="Pellet")
-        if not reasoner.has_consistent_ontology():
-            print("The knowledge base is not consistent")
-            return {}
-
-        return {C.iri.split('#')[-1]: {i.str for i in reasoner.instances(iri_to_owl_class(C.iri), direct=False)} for C in onto.classes()}
-    
-    def iri_to_owl_class(iri: str):
-        """
-        Converts an IRI string to an OWLClass representation.
-
-        :param iri: Full IRI string of the class (e.g., 'http://example.com/father#person')
-        :return: OWLClass(IRI(namespace, class_name))
-        """
-        
-        if '#' in iri:
-            namespace, class_name = iri.rsplit('#', 1)
-        elif '/' in iri:
-            namespace, class_name = iri.rsplit('/', 1)
-        else:
-            raise ValueError("Invalid IRI format")
-        
-        return OWLClass(IRI(namespace + "#", class_name))
-    
-
     
     def get_reasoner(path_onto: str) -> SyncReasoner:
         """
@@ -580,31 +555,32 @@ def subsumption_caching_size(func, cache_size: int, eviction_strategy: str, rand
         Initializes it only once per ontology.
         """
         if path_onto not in loaded_reasoners:
-            loaded_reasoners[path_onto] = SyncReasoner(path_onto, reasoner="Pellet")
+            # Shares the Pellet reasoner materialized for the class extensions
+            loaded_reasoners[path_onto] = get_symbolic_reasoner(path_onto, "Pellet")
 
-            if not loaded_reasoners[path_onto].has_consistent_ontology():
+            if not consistent_ontologies[(path_onto, "Pellet")]:
                 print(f"Warning: The ontology {path_onto} is inconsistent.")
                 loaded_reasoners[path_onto] = None  # Avoid using an inconsistent reasoner
         
         return loaded_reasoners[path_onto]
 
-    def instance_of(path_onto: str, a: str, C: str) -> bool:
+    def instances_of(path_onto: str, individuals: Set[str], C) -> Set[str]:
         """
-        Checks whether an individual `a` is an instance of `C`.
+        Returns the individuals of `individuals` that are instances of `C`.
 
         - Uses precomputed instances for **named** classes.
-        - Falls back to **reasoner check** for arbitrary expressions.
+        - Falls back to **a single reasoner query** for arbitrary expressions instead of one per individual.
         - Reuses a **single reasoner instance** per ontology.
         """
         named_class_instances = precomputed_instances.get(path_onto, {}).get(C, set())
         if named_class_instances:
-            return a in named_class_instances
+            return individuals & named_class_instances
 
         reasoner = get_reasoner(path_onto)
         if reasoner is None:
-            return False  # Skip reasoning if ontology is inconsistent
+            return set()  # Skip reasoning if ontology is inconsistent
 
-        return a in {i.str for i in reasoner.instances(C, direct=False)}
+        return individuals & {i.str for i in reasoner.instances(C, direct=False)}
 
 
     def precompute_subsumption_hierarchy(path_onto: str, concepts: Set[str]) -> Dict[str, Set[str]]:
@@ -628,12 +604,11 @@ def subsumption_caching_size(func, cache_size: int, eviction_strategy: str, rand
 
         path_onto = args[1]
         if path_onto not in loaded_ontologies:
-            loaded_ontologies[path_onto] = get_ontology(path_onto).load()
+            loaded_ontologies[path_onto] = get_loaded_ontology(path_onto)
             loaded_individuals[path_onto] = {a.iri for a in list(loaded_ontologies[path_onto].individuals())}
  
-        onto = loaded_ontologies[path_onto]
         All_individuals = loaded_individuals[path_onto]
-        precomputed_instances[path_onto] = precompute_class_instances(path_onto, onto)  # Precompute instances
+        precomputed_instances[path_onto] = precompute_class_instances(path_onto)  # Precompute instances
         
 
         str_expression = owl_expression_to_dl(args[0])
@@ -667,7 +642,7 @@ def subsumption_caching_size(func, cache_size: int, eviction_strategy: str, rand
         else:
             instances = set.intersection(*(cache.get(D) for D in super_concepts))
 
-        instance_set = {a for a in instances if instance_of(path_onto, a, owl_expression)}
+        instance_set = instances_of(path_onto, instances, owl_expression)
 
         cache.put(str_expression, instance_set)
         stats['time'] += (time.time() - start_time)
@@ -696,18 +671,91 @@ def subsumption_caching_size(func, cache_size: int, eviction_strategy: str, rand
 
 
 
+# Reasoners are materialized once per (KG, reasoner) and shared by every run of the cache-size sweep, so that
+# only the cache configuration varies between runs and the ontology is not reloaded for every query.
+loaded_neural_reasoners: Dict[Tuple[str, str], TripleStoreNeuralReasoner] = {}
+loaded_symbolic_reasoners: Dict[Tuple[str, str], SyncReasoner] = {}
+consistent_ontologies: Dict[Tuple[str, str], bool] = {}
+loaded_owlready_ontologies: Dict[str, Any] = {}
+
+
+def get_loaded_ontology(path_onto: str):
+    """Return the owlready2 ontology of the given path, loading it only on first use."""
+    if path_onto not in loaded_owlready_ontologies:
+        loaded_owlready_ontologies[path_onto] = get_ontology(path_onto).load()
+    return loaded_owlready_ontologies[path_onto]
+
+
+def get_neural_reasoner(path_kg: str, path_kge_model: str) -> TripleStoreNeuralReasoner:
+    """Return the neural reasoner for the given KG/embedding model, building it only on first use."""
+    key = (path_kg, path_kge_model)
+    if key not in loaded_neural_reasoners:
+        if path_kge_model:
+            loaded_neural_reasoners[key] = TripleStoreNeuralReasoner(path_neural_embedding=path_kge_model, gamma=0.9)
+        else:
+            loaded_neural_reasoners[key] = TripleStoreNeuralReasoner(path_of_kb=path_kg, gamma=0.9)
+    return loaded_neural_reasoners[key]
+
+
+def get_symbolic_reasoner(path_kg: str, name_reasoner: str) -> SyncReasoner:
+    """Return the symbolic reasoner for the given KG, building it and checking consistency only on first use."""
+    key = (path_kg, name_reasoner)
+    if key not in loaded_symbolic_reasoners:
+        loaded_symbolic_reasoners[key] = SyncReasoner(path_kg, reasoner=name_reasoner)
+        consistent_ontologies[key] = loaded_symbolic_reasoners[key].has_consistent_ontology()
+    return loaded_symbolic_reasoners[key]
+
+
+def iri_to_owl_class(iri: str):
+    """
+    Converts an IRI string to an OWLClass representation.
+
+    :param iri: Full IRI string of the class (e.g., 'http://example.com/father#person')
+    :return: OWLClass(IRI(namespace, class_name))
+    """
+    
+    if '#' in iri:
+        namespace, class_name = iri.rsplit('#', 1)
+    elif '/' in iri:
+        namespace, class_name = iri.rsplit('/', 1)
+    else:
+        raise ValueError("Invalid IRI format")
+    
+    return OWLClass(IRI(namespace + "#", class_name))
+
+
+@lru_cache(maxsize=None)
+def precompute_class_instances(path_onto: str) -> Dict[str, Set[str]]:
+    """
+    Precomputes all instances for each named concept in the ontology using the reasoner.
+    The extensions are computed once per ontology and shared by every run of the cache-size sweep.
+    """
+    reasoner = get_symbolic_reasoner(path_onto, "Pellet")
+    if not consistent_ontologies[(path_onto, "Pellet")]:
+        print("The knowledge base is not consistent")
+        return {}
+
+    onto = get_loaded_ontology(path_onto)
+    return {C.iri.split('#')[-1]: {i.str for i in reasoner.instances(iri_to_owl_class(C.iri), direct=False)} for C in onto.classes()}
+
+
+def clear_loaded_reasoners():
+    """Drop the materialized reasoners, loaded ontologies and class extensions, e.g. when the sweep moves to another KG."""
+    loaded_neural_reasoners.clear()
+    loaded_symbolic_reasoners.clear()
+    consistent_ontologies.clear()
+    loaded_owlready_ontologies.clear()
+    precompute_class_instances.cache_clear()
+
+
 def retrieve(expression:str, path_kg:str, path_kge_model:str) -> Tuple[Set[str], Set[str]]:
     '''Retrieve instances with neural reasoner'''
     'take a concept c and returns it set of retrieved individual'
 
-    if path_kge_model:
-        neural_owl_reasoner = TripleStoreNeuralReasoner(
-            path_neural_embedding=path_kge_model, gamma=0.9
-        )
-    else:
-        neural_owl_reasoner = TripleStoreNeuralReasoner(
-            path_of_kb=path_kg, gamma=0.9
-        )
+    neural_owl_reasoner = get_neural_reasoner(path_kg, path_kge_model)
+    # The reasoner is shared, its memoized link predictions are not: every retrieval starts cold as with a freshly
+    # built reasoner, so the timings with and without the semantic cache are not skewed by earlier retrievals.
+    neural_owl_reasoner.predict.cache_clear()
     retrievals = concept_retrieval(neural_owl_reasoner, expression) # Retrieving with our reasoner
     return retrievals
 
@@ -715,9 +763,9 @@ def retrieve(expression:str, path_kg:str, path_kge_model:str) -> Tuple[Set[str],
 def retrieve_other_reasoner(expression, path_kg, name_reasoner='HermiT'): 
     '''Retrieve instances with symbolic reasoners'''
     
-    reasoner = SyncReasoner(path_kg, reasoner=name_reasoner)
+    reasoner = get_symbolic_reasoner(path_kg, name_reasoner)
    
-    if reasoner.has_consistent_ontology():
+    if consistent_ontologies[(path_kg, name_reasoner)]:
         return {i.str for i in (reasoner.instances(expression, direct=False))}
     else:
         print("The knowledge base is not consistent") 
@@ -731,7 +779,7 @@ def run_semantic_cache(path_kg:str, path_kge:str, cache_size:int, name_reasoner:
     D = []
     Avg_jaccard = []
     Avg_jaccard_reas = []
-    data_name = path_kg.split("/")[-1].split("/")[-1].split(".")[0]
+    data_name = get_data_name(path_kg)
 
     if shuffle_concepts:
         alc_concepts = get_saved_concepts(path_kg, data_name=data_name, shuffle=True) 
@@ -811,7 +859,7 @@ def run_non_semantic_cache(path_kg:str, path_kge:str, cache_size:int, name_reaso
     D = []
     Avg_jaccard = []
     Avg_jaccard_reas = []
-    data_name = path_kg.split("/")[-1].split("/")[-1].split(".")[0]
+    data_name = get_data_name(path_kg)
 
     if shuffle_concepts:
         alc_concepts = get_saved_concepts(path_kg, data_name=data_name, shuffle=True) 
@@ -888,7 +936,7 @@ def run_subsumption_cache(path_kg:str, path_kge:str, cache_size:int, name_reason
     D = []
     Avg_jaccard = []
     Avg_jaccard_reas = []
-    data_name = path_kg.split("/")[-1].split("/")[-1].split(".")[0]
+    data_name = get_data_name(path_kg)
 
     if shuffle_concepts:
         alc_concepts = get_saved_concepts(path_kg, data_name=data_name, shuffle=True) 
@@ -215,6 +215,9 @@ class TentrisReasoner(OWLReasonerEx):
 class EvaluatedConceptTentris(EvaluatedConcept):
     __slots__ = ()
 
+    def __init__(self, q: float = 0):
+        self.q = q
+
     @property
     def inds(self):
         if logger.isEnabledFor(oplogging.TRACE):
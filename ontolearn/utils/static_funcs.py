@@ -22,7 +22,6 @@
 # SOFTWARE.
 # -----------------------------------------------------------------------------
 import pandas
-import matplotlib.pyplot as plt
 import sklearn
 import numpy as np
 import traceback
@@ -254,6 +253,7 @@ def compute_f1_score_from_confusion_matrix(confusion_matrix:dict)->float:
 def plot_umap_reduced_embeddings(X: pandas.DataFrame, y: List[float], name: str = "umap_visualization.pdf") -> None:  # pragma: no cover
     # TODO:AB: 'umap' is not part of the dependencies !?
     import umap
+    import matplotlib.pyplot as plt
     reducer = umap.UMAP(random_state=1)
     embedding = reducer.fit_transform(X)
     plt.scatter(embedding[:, 0], embedding[:, 1],
@@ -279,6 +279,7 @@ def plot_decision_tree_of_expressions(feature_names, cart_tree) -> None:  # prag
         This function plots the decision tree using matplotlib and saves it to a PDF file named 'cart_decision_tree.pdf'.
         It also displays the plot.
     """
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(10, 10))
     sklearn.tree.plot_tree(cart_tree, fontsize=10, feature_names=feature_names, class_names=["Negative", "Positive"],
                            filled=True)
@@ -302,6 +303,7 @@ def plot_topk_feature_importance(feature_names, cart_tree, topk: int = 10)->None
         with the top k features displayed. The importance is measured by the normalized total reduction.
         The plot is displayed using matplotlib.
     """
+    import matplotlib.pyplot as plt
     fig, ax = plt.subplots()
     topk_id = np.argsort(cart_tree.feature_importances_)[-topk:]
     expressions = [feature_names[i] for i in topk_id.tolist()]
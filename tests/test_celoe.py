@@ -1,19 +1,23 @@
 """ Test the default pipeline for structured machine learning"""
 import json
-from owlapy.class_expression import OWLClass
+from owlapy.class_expression import OWLClass, OWLObjectUnionOf, OWLNothing
 from owlapy.iri import IRI
 from owlapy.owl_individual import OWLNamedIndividual
 from ontolearn.knowledge_base import KnowledgeBase
 from ontolearn.concept_learner import CELOE
+from ontolearn.learners.celoe import _sorted_operands
+from ontolearn.metrics import Accuracy
 from ontolearn.learning_problem import PosNegLPStandard
 from ontolearn.utils import compute_f1_score
 from owlapy.render import DLSyntaxObjectRenderer
 import json
 import os
+import numpy as np
 from ontolearn.knowledge_base import KnowledgeBase
 from ontolearn.learners import OCEL
 from ontolearn.learning_problem import PosNegLPStandard
 from ontolearn.utils import setup_logging
+from ontolearn.search import OENode, HeuristicQueue
 from owlapy.owl_individual import OWLNamedIndividual, IRI
 from owlapy.class_expression import OWLClass
 
@@ -159,6 +163,44 @@ class TestCeloe:
         r = DLSyntaxObjectRenderer()
         assert r.render(best_pred)=='(¬female) ⊓ (∃ hasChild.⊤)'
 
+    def test_union_retrieval(self):
+        kb = KnowledgeBase(path=PATH_DATA_FATHER)
+        pos = {OWLNamedIndividual(IRI.create("http://example.com/father#" + name))
+               for name in ("stefan", "markus", "martin")}
+        neg = {OWLNamedIndividual(IRI.create("http://example.com/father#" + name))
+               for name in ("heinz", "anna", "michelle")}
+        model = CELOE(knowledge_base=kb)
+        model.fit(pos=pos, neg=neg)
+
+        female = OWLClass(IRI.create("http://example.com/father#female"))
+        male = OWLClass(IRI.create("http://example.com/father#male"))
+        model._individuals_set(female)
+        model._individuals_set(male)
+        # a union is retrieved from the knowledge base even if all of its operands are cached
+        union = OWLObjectUnionOf((female, male))
+        inds = model._individuals_set(union)
+        assert inds == kb.individuals_set(union)
+        # and its example bitset is derived from the retrieved individuals, not from the bitsets of the operands
+        model._example_bits(female, model._individuals_set(female))
+        model._example_bits(male, model._individuals_set(male))
+        bits = model._example_bits(_sorted_operands(union.get_nnf()), inds)
+        covered = np.unpackbits(bits.view(np.uint8), bitorder='little')[:len(model._examples)].astype(bool)
+        assert covered.tolist() == [e in inds for e in model._examples]
+
+    def test_empty_concept_quality(self):
+        kb = KnowledgeBase(path=PATH_DATA_FATHER)
+        pos = {OWLNamedIndividual(IRI.create("http://example.com/father#" + name))
+               for name in ("stefan", "markus", "martin")}
+        neg = {OWLNamedIndividual(IRI.create("http://example.com/father#" + name))
+               for name in ("heinz", "anna", "michelle")}
+        model = CELOE(knowledge_base=kb, quality_func=Accuracy(), max_num_of_concepts_tested=10)
+        model.fit(pos=pos, neg=neg)
+
+        # a concept without instances is still scored by the quality function: every negative is a true negative
+        node = OENode(OWLNothing, 1, is_root=True)
+        model._add_node(node, None)
+        assert node.quality == round(len(neg) / (len(pos) + len(neg)), 5)
+
     def test_multiple_fits(self):
         kb = KnowledgeBase(path=PATH_FAMILY)
 
@@ -196,3 +238,27 @@ class TestCeloe:
 
         assert q == q2
         assert str_concept == str_concept2
+
+    def test_heuristic_queue(self):
+        nodes = []
+        for name, heuristic in (("A", 0.5), ("B", 0.9), ("C", 0.7)):
+            node = OENode(OWLClass(IRI.create("http://example.com/father#" + name)), 1)
+            node.heuristic = heuristic
+            nodes.append(node)
+        a, b, c = nodes
+        queue = HeuristicQueue()
+        for node in nodes:
+            queue.add(node)
+        assert len(queue) == 3
+        assert queue.peek() is b
+        assert queue.first(lambda n: n is not b) is c
+        assert queue.descending() == [b, c, a]
+
+        # lazily removed entries are skipped once the heuristic of a node changes
+        queue.discard(b)
+        b.heuristic = None
+        b.heuristic = 0.1
+        queue.add(b)
+        assert len(queue) == 3
+        assert queue.peek() is c
+        assert queue.descending() == [c, a, b]
@@ -27,3 +27,53 @@ class TestKnowledgeBase:
         # Direct concept hierarchy from Top to Bottom.
         for concept in kb.class_hierarchy.items():
             print(f'{concept.str} => {[c.str for c in kb.get_direct_sub_concepts(concept)]}')
+
+    def test_individuals_cache(self):
+        kb = KnowledgeBase(path="KGs/Family/family-benchmark_rich_background.owl", individuals_cache_size=8)
+        uncached = KnowledgeBase(path="KGs/Family/family-benchmark_rich_background.owl", individuals_cache_size=0)
+        for _ in range(2):
+            for c in kb.get_concepts():
+                assert kb.individuals(c) == uncached.individuals(c)
+            kb.clean()
+
+    def test_ignore_and_view(self):
+        kb = KnowledgeBase(path="KGs/Family/family-benchmark_rich_background.owl")
+        for ignored in ({c for c in kb.get_concepts() if c.iri.get_remainder() in ('Male', 'Parent')},
+                        {c for c in kb.get_concepts() if c.iri.get_remainder() == 'Person'}):
+            copied = kb.ignore_and_copy(ignored_classes=ignored)
+            viewed = kb.ignore_and_view(ignored_classes=ignored)
+            # the domain masks are shared, so is the index of their columns
+            assert viewed._ind_index is kb._ind_index is copied._ind_index
+            assert set(viewed.get_concepts()) == set(copied.get_concepts())
+            assert set(viewed.least_general_named_concepts()) == set(copied.least_general_named_concepts())
+            assert set(viewed.most_general_classes()) == set(copied.most_general_classes())
+            # the second round is answered from the memoized neighbours of the view
+            for _ in range(2):
+                for c in copied.get_concepts():
+                    assert set(viewed.get_direct_sub_concepts(c)) == set(copied.get_direct_sub_concepts(c))
+                    assert set(viewed.get_direct_parents(c)) == set(copied.get_direct_parents(c))
+
+    def test_properties_for_domain(self):
+        kb = KnowledgeBase(path="KGs/Family/family-benchmark_rich_background.owl")
+        for c in kb.get_concepts():
+            for inverse in (False, True):
+                func = kb.get_object_property_ranges if inverse else kb.get_object_property_domains
+                expected = {p for p in kb.object_property_hierarchy.most_general_roles()
+                            if kb.individuals_set(c) <= kb.individuals_set(func(p))}
+                assert set(kb.most_general_object_properties(domain=c, inverse=inverse)) == expected
+
+    def test_cache_individuals_batch(self):
+        kb = KnowledgeBase(path="KGs/Family/family-benchmark_rich_background.owl", individuals_cache_size=0)
+        concepts = list(kb.get_concepts())
+        ces = [kb.generator.intersection([c, d]) for c in concepts[:5] for d in concepts[:5] if c != d] + concepts
+        assert kb._cache_individuals_batch(ces) == [frozenset(kb.reasoner.instances(ce)) for ce in ces]
+
+    def test_individuals_cache_growth(self):
+        kb = KnowledgeBase(path="KGs/Family/family-benchmark_rich_background.owl", individuals_cache_size=2,
+                           individuals_cache_soft_cap=16, individuals_cache_resize_period=10)
+        concepts = list(kb.get_concepts())
+        ces = [kb.generator.negation(c) for c in concepts[:8]]
+        for _ in range(20):
+            for ce in ces:
+                assert kb.individuals(ce) == frozenset(kb.reasoner.instances(ce))
+        assert len(ces) <= kb._cached_instances.maxsize <= 16
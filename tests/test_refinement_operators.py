@@ -214,6 +214,19 @@ class ModifiedCELOERefinementTest(unittest.TestCase):
                               max_length=4, current_domain=self.generator.thing))
         self.assertIn(OWLObjectMinCardinality(2, self.in_bond, self.bond), refs)
 
+    def test_object_some_values_from_pruning_table(self):
+        rho = ModifiedCELOERefinement(self.kb, use_all_constructor=True)
+        unpruned_refs = set(rho.refine(OWLObjectSomeValuesFrom(self.in_bond, self.bond),
+                                       max_length=3, current_domain=self.generator.thing))
+        rho.build_pruning_table()
+        for prop, c in rho.existential_pruning_table:
+            self.assertGreater(self.kb.individuals_count(OWLObjectSomeValuesFrom(prop, c)), 0)
+        refs = set(rho.refine(OWLObjectSomeValuesFrom(self.in_bond, self.bond),
+                              max_length=3, current_domain=self.generator.thing))
+        self.assertLessEqual(refs, unpruned_refs)
+        for i in unpruned_refs - refs:
+            self.assertEqual(self.kb.individuals_count(i), 0)
+
     def test_object_all_values_from_refinements(self):
         rho = ModifiedCELOERefinement(self.kb, use_all_constructor=True)
         true_refs = set(map(partial(OWLObjectAllValuesFrom, self.in_bond), self.all_bond_classes))